@@ -13,8 +13,74 @@ THUMBDIR = os.path.join(ASSETDIR, 'thumbnails')
 
 FILMLISTE_FILENAME = 'filmliste.txt'
 
+# This lists the mirrors from which the current Filmliste can be downloaded.
+FILMLISTE_INDEX_URI = 'https://res.mediathekview.de/akt.xml'
+
+# The Filmliste is inserted into the database in chunks of that many rows to keep the memory consumption constant.
+FILMLISTE_INSERT_CHUNK_SIZE = 10000
+
+# Decoding the Filmliste is CPU-bound, so it is spread over that many processes. Set it to 1 to decode in the main process.
+# The rows are still merged into the database by the main process one after another (see Filmliste._merge_rows), so more than a
+# few processes don't make loading any faster.
+FILMLISTE_DECODING_PROCESSES = min(4, os.cpu_count() or 1)
+# Each process decodes pieces of the file of roughly that many bytes…
+FILMLISTE_DECODING_BYTE_RANGE_SIZE = 8 * 1024 * 1024
+# …or that many lines if the Filmliste is streamed from the archive.
+FILMLISTE_DECODING_CHUNK_SIZE = 10000
+
+# If this is set, the Filmliste is held in memory with some indexes and searched there instead of in SQLite.
+# This takes some seconds and memory at startup, but makes each search much faster.
+FILMLISTE_IN_MEMORY_INDEX = False
+
+# With 'sqlite', the Filmliste is loaded into the database. With 'raw', filmliste.txt is memory-mapped instead, and only the titles
+# are read at startup to build the in-memory index. The other columns are decoded when a search finds the row.
+FILMLISTE_ROW_STORE = 'sqlite'
+
+# The columns of the Filmliste that are neither searched nor shown (e.g., the description) are only stored if this is set.
+FILMLISTE_STORE_COLD_COLUMNS = False
+
+# With the 'sources' profile, only the channels that the configured sources search in are loaded from the Filmliste (see
+# get_filmliste_channels in sources.py). This makes loading and searching much faster. With the 'full' profile, all channels are
+# loaded, so that the searches without series can find videos of other channels as well.
+FILMLISTE_LOAD_PROFILE = 'sources'
+
+# All HTTP requests share a pool of keep-alive connections (see HttpClient). To be polite, we send no more than that many requests
+# per second to each host (after a burst of a few requests).
+HTTP_POOL_SIZE = 16
+HTTP_REQUESTS_PER_SECOND_PER_HOST = 1
+HTTP_BURST_PER_HOST = 1
+
+# The video links are checked in that many threads, but not more than that many at once for the same host.
+LINK_CHECK_THREADS = 16
+LINK_CHECK_THREADS_PER_HOST = 4
+# The links point to the CDNs, which can take more requests than the pages of the broadcasters.
+LINK_CHECK_REQUESTS_PER_SECOND_PER_HOST = 20
+
 QUALITY_HIGH = 3
 QUALITY_MEDIUM = 2
 QUALITY_LOW = 1
 
-MAX_CACHE_AGE = relativedelta(months=1)
+# The results of the link checks are cached. Working links are checked again after a longer time than broken ones because
+# they rarely break, while broken links are often just not online yet. Until then, the cached result is used anyway and the
+# link is checked again in the background (see Filmliste.check_links).
+MAX_CACHE_AGE_WORKING = relativedelta(months=1)
+MAX_CACHE_AGE_BROKEN = relativedelta(days=3)
+
+# The downloaded pages are used for that long. After that, we ask the broadcasters whether they have changed (see download_cached),
+# which is cheap if they have not.
+PAGE_CACHE_MAX_AGE = relativedelta(hours=12)
+# The pages are kept compressed in that directory (see PageCache). If they take more than that many bytes, the least recently
+# used ones are removed.
+PAGE_CACHE_DIR = os.path.join(cachedir, 'pages')
+PAGE_CACHE_MAX_SIZE = 64 * 1024 * 1024
+# The pages of a paginated series are downloaded in that many threads (see download_many_cached).
+PAGE_DOWNLOAD_THREADS = 4
+
+# The thumbnails are downscaled to the width in which the player shows them (see li.Video img in style.css) and recompressed.
+# The original images are kept in THUMBNAIL_ORIGINALS_DIR, so that this is only done again if they change.
+THUMBNAIL_WIDTH = 300
+THUMBNAIL_JPEG_QUALITY = 80
+THUMBNAIL_ORIGINALS_DIR = os.path.join(cachedir, 'thumbnails')
+# The images are downloaded in that many threads and downscaled in that many processes.
+THUMBNAIL_DOWNLOAD_THREADS = 4
+THUMBNAIL_PROCESSES = os.cpu_count() or 1
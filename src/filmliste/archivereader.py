@@ -0,0 +1,61 @@
+import lzma
+import re
+from typing import Iterator
+
+from constants import FILMLISTE_INDEX_URI
+from tools.http_client import http_client
+
+# The archive is one big JSON object: {"Filmliste":[<meta information>],"Filmliste":[<header>],"X":[<record>],"X":[<record>],…}
+# We don't parse it as a whole. Instead, we cut it into the same lines that filmliste.txt used to have: the header first and then
+# one record per line.
+HEADER_KEY = b',"Filmliste":'
+RECORD_SEPARATOR = b',"X":'
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def get_archive_uri() -> str:
+    # This small XML file lists the mirrors of the current Filmliste. We take the first one.
+    response = http_client.get(FILMLISTE_INDEX_URI)
+    if response.status_code != 200:
+        raise Exception
+
+    return re.search(pattern=r'https[^<]+', string=response.text).group(0)
+
+
+def read_archive_lines(uri: str) -> Iterator[bytes]:
+    # We decompress the archive while downloading it and hand out each record as soon as it is complete.
+    # This way, the uncompressed Filmliste never needs to be on disk (or in memory) as a whole.
+    decompressor = lzma.LZMADecompressor()
+    buffer = b''
+    header_found = False
+
+    with http_client.get(uri, stream=True) as response:
+        if response.status_code != 200:
+            raise Exception
+
+        for compressed_chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            if decompressor.eof:
+                break
+            buffer += decompressor.decompress(compressed_chunk)
+
+            if not header_found:
+                # Skip the meta information in the beginning.
+                position = buffer.find(HEADER_KEY)
+                if position < 0:
+                    continue
+                buffer = buffer[position + len(HEADER_KEY):]
+                header_found = True
+
+            # The last part might be an incomplete record. We keep it until the next chunk arrives.
+            *records, buffer = buffer.split(RECORD_SEPARATOR)
+            yield from records
+
+    if not header_found:
+        raise Exception
+
+    # The last record is followed by the closing brace of the JSON object.
+    buffer = buffer.rstrip()
+    if buffer.endswith(b'}'):
+        buffer = buffer[:-1]
+    yield buffer
@@ -1,23 +1,61 @@
-from ast import parse
+import hashlib
 import json
+import multiprocessing
 import os
+import pathlib
 import re
 import sqlite3
-from datetime import datetime, timezone
-from typing import Tuple
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-import requests
-from constants import (ASSETDIR, FILMLISTE_FILENAME, MAX_CACHE_AGE,
+from constants import (ASSETDIR, FILMLISTE_DECODING_BYTE_RANGE_SIZE,
+                       FILMLISTE_DECODING_CHUNK_SIZE,
+                       FILMLISTE_DECODING_PROCESSES, FILMLISTE_FILENAME,
+                       FILMLISTE_IN_MEMORY_INDEX, FILMLISTE_INSERT_CHUNK_SIZE,
+                       FILMLISTE_ROW_STORE, FILMLISTE_STORE_COLD_COLUMNS,
+                       MAX_CACHE_AGE_BROKEN, MAX_CACHE_AGE_WORKING,
                        PERMANENTDIR, QUALITY_HIGH, QUALITY_MEDIUM)
+from tools.misc import group_by
 
+from filmliste.archivereader import get_archive_uri, read_archive_lines
+from filmliste.inmemoryindex import InMemoryIndex
+from filmliste.linkchecker import LinkChecker
 from filmliste.matchers.cleantitlematcher import CleanTitleMatcher
 from filmliste.matchers.cleantitlesubstringmatcher import \
     CleanTitleSubstringMatcher
+from filmliste.matchers.matcher import (LINK_EXPRESSION, SERIES_INDEX_NAME,
+                                        Matcher)
 from filmliste.matchers.originaltitlematcher import OriginalTitleMatcher
 from filmliste.matchers.prefixfreecleantitlesubstringmatcher import \
     PrefixFreeCleanTitleSubstringMatcher
-from filmliste.matchers.prefixfreetokenizedcleantitlesubsetmatcher import \
-    PrefixFreeTokenizedCleanTitleSubsetMatcher
+from filmliste.matchers.prefixfreetokenizedcleantitlesubsetmatcher import (
+    PrefixFreeTokenizedCleanTitleSubsetMatcher, tokenize)
+from filmliste.rawstore import RawStore
+
+
+# These columns are neither searched nor shown. They are only stored if FILMLISTE_STORE_COLD_COLUMNS is set, and then in the
+# video_details table so that the videos table stays small.
+COLD_COLUMNS = [
+    'time',
+    'duration',
+    'size',
+    'description',
+    'website',
+    'url_subtitle',
+    'url_rtmp',
+    'url_small',
+    'url_rtmp_small',
+    'url_rtml_hd',
+    'url_history',
+    'geo',
+    'new',
+]
+
+DATE_PATTERN = re.compile(r'^(?P<day>[0-9]{2})\.(?P<month>[0-9]{2})\.(?P<year>[0-9]{4})$')
 
 
 class Filmliste:
@@ -25,9 +63,59 @@ class Filmliste:
     data = None
     connection = None
 
+    # Increase this whenever the layout of the database changes. Then, the old tables are dropped and rebuilt.
+    SCHEMA_VERSION = 11
+
+    # This tells whether the SQLite library supports the full-text index on the titles (see _setup_full_text_search).
+    full_text_search = False
+
+    # This is the optional in-memory index that the matchers use instead of SQLite (see FILMLISTE_IN_MEMORY_INDEX).
+    index = None
+
+    # If the rows are not stored in SQLite, they are read from filmliste.txt directly (see FILMLISTE_ROW_STORE).
+    raw_store = None
+
+    DATABASE_FILENAME = os.path.join(PERMANENTDIR, 'database.sqlite')
+
+    # If this is set, only the rows of these channels are loaded. Unless it is set before the Filmliste is opened for the first
+    # time, it is taken from the configured sources (see FILMLISTE_LOAD_PROFILE and _get_configured_channels). It stays None if
+    # all channels are to be loaded.
+    channels = None
+
+    # This is the archive that has been loaded in this run, if any (see update_from_archive).
+    loaded_archive_uri = None
+
+    # The searches might run in several threads. They read through a connection per thread (see _get_read_connection), but
+    # their writes (e.g., to the caches) go through the one connection and need to hold this lock.
+    write_lock = threading.RLock()
+    thread_local = threading.local()
+
+    # This checks whether the video links work (see check_links). It is only created when it is needed because every process
+    # that imports this (e.g., the workers of the parallel decoding) would create it otherwise (see _get_link_checker).
+    link_checker = None
+    # Expired links are checked again in this background worker. It is waited for before the program exits. Like the link
+    # checker, it is only created when it is needed (see _get_revalidation_executor).
+    revalidation_executor = None
+    revalidating_uris = set()
+
     # Thise are fields that we derive from the data and cannot be found in the source file.
+    # The link is not stored, but derived from the URLs when it is selected (see LINK_EXPRESSION).
     VIDEO_LINK_COLUMN_NAME = 'link'
     VIDEO_LINK_QUALITY_COLUMN_NAME = 'link_quality'
+    ROW_HASH_COLUMN_NAME = 'row_hash'
+
+    # These are the columns of the candidates that the matchers find.
+    CANDIDATE_COLUMNS = ['series', 'title', 'date', 'link', 'link_quality']
+
+    # These triggers and indexes are dropped while the empty table is filled, and created again afterwards (see _merge_rows).
+    INSERT_TRIGGER_NAMES = ['videos_fts_insert', 'title_tokens_insert', 'changed_series_insert']
+    SECONDARY_INDEX_NAMES = ['title_index', SERIES_INDEX_NAME, 'series_date_index', 'title_tokens_video_index']
+
+    # This is the hash of the line that a row was decoded from. It is not stored, but part of the row hash (see _add_row_hashes).
+    LINE_HASH_KEY = 'line_hash'
+
+    # These columns are compressed in the source file (see _decompress_rows).
+    COMPRESSED_COLUMNS = ['channel', 'series']
 
     # These are the headers in the Filmliste and in SQL (with the corresponding SQL type).
     # If new keys arise, they are silently ignored.
@@ -43,7 +131,6 @@ class Filmliste:
         ('Größe [MB]', 'size', 'INTEGER'),
         # Sometimes, the description is missing (and it's not a compression issue).
         ('Beschreibung', 'description', 'TEXT'),
-        (None, VIDEO_LINK_COLUMN_NAME, 'TEXT'),
         (None, VIDEO_LINK_QUALITY_COLUMN_NAME, 'INTEGER'),
         ('Url', 'url', 'TEXT NOT NULL'),
         # Some channels don't provide a website.
@@ -59,8 +146,19 @@ class Filmliste:
         ('Url History', 'url_history', 'TEXT'),
         ('Geo', 'geo', 'TEXT'),
         ('neu', 'new', 'INTEGER NOT NULL'),
+        # This is the date in ISO format (YYYY-MM-DD), so that it can be compared and sorted (see _add_sortable_dates).
+        (None, 'sortable_date', 'TEXT'),
+        # This is a hash over the line in the source file. It tells us whether a row has changed since the last load.
+        (None, ROW_HASH_COLUMN_NAME, 'TEXT NOT NULL'),
+    ]
+
+    database_columns = [
+        column_name
+        for (_, column_name, _)
+        in header_lookup
+        if column_name not in COLD_COLUMNS
     ]
-    database_columns = [column_name for (_, column_name, _) in header_lookup]
+    detail_columns = COLD_COLUMNS if FILMLISTE_STORE_COLD_COLUMNS else []
     database_column_2_create_clause = {
         column_name: create_clause
         for (_, column_name, create_clause)
@@ -70,11 +168,35 @@ class Filmliste:
     def _setup_database() -> None:
         cursor = Filmliste.connection.cursor()
 
-        cursor.execute('DROP TABLE IF EXISTS videos')
-        cursor.execute('DROP INDEX IF EXISTS title_index')
-        cursor.execute('DROP INDEX IF EXISTS series_index')
+        # This table holds some facts about the database itself and about the file it was loaded from.
+        cursor.execute(
+            'CREATE TABLE IF NOT EXISTS metadata ('
+            'key TEXT PRIMARY KEY, '
+            'value'
+            ')'
+        )
 
-        create_videos_table_statement = 'CREATE TABLE videos ('
+        # We keep the table between two runs and update it incrementally. Only if the schema has changed (e.g., by an
+        # update of this code), we need to start from scratch.
+        # Whether the cold columns are stored changes the layout as well. So does the row store: The raw store leaves the
+        # tables empty, but remembers the source file like the database does (see _open_raw_store).
+        if (
+            Filmliste._get_metadata('schema_version') != Filmliste.SCHEMA_VERSION
+            or Filmliste._get_metadata('cold_columns_stored') != FILMLISTE_STORE_COLD_COLUMNS
+            or Filmliste._get_metadata('row_store') != FILMLISTE_ROW_STORE
+        ):
+            cursor.execute('DROP TABLE IF EXISTS videos')
+            cursor.execute('DROP TABLE IF EXISTS video_details')
+            cursor.execute('DROP TABLE IF EXISTS videos_fts')
+            cursor.execute('DROP TABLE IF EXISTS title_tokens')
+            cursor.execute('DROP TABLE IF EXISTS changed_series')
+            cursor.execute('DROP TABLE IF EXISTS search_cache')
+            cursor.execute('DELETE FROM metadata')
+            Filmliste._set_metadata('schema_version', Filmliste.SCHEMA_VERSION)
+            Filmliste._set_metadata('cold_columns_stored', FILMLISTE_STORE_COLD_COLUMNS)
+            Filmliste._set_metadata('row_store', FILMLISTE_ROW_STORE)
+
+        create_videos_table_statement = 'CREATE TABLE IF NOT EXISTS videos ('
 
         column_create_clause_pairs = [
             f'{column_name} {Filmliste.database_column_2_create_clause[column_name]}'
@@ -87,9 +209,96 @@ class Filmliste:
 
         cursor.execute(create_videos_table_statement)
 
+        # The cold columns (if any) are stored apart from the videos table, one row per video.
+        # Changed rows lose their details, which are then written anew by _merge_rows.
+        create_video_details_table_statement = 'CREATE TABLE IF NOT EXISTS video_details (video_id INTEGER PRIMARY KEY'
+        for column_name in Filmliste.detail_columns:
+            create_video_details_table_statement += f', {column_name} {Filmliste.database_column_2_create_clause[column_name]}'
+        create_video_details_table_statement += ')'
+
+        cursor.execute(create_video_details_table_statement)
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS video_details_delete AFTER DELETE ON videos BEGIN '
+            'DELETE FROM video_details WHERE video_id = old.rowid; '
+            'END'
+        )
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS video_details_update AFTER UPDATE ON videos BEGIN '
+            'DELETE FROM video_details WHERE video_id = old.rowid; '
+            'END'
+        )
+
         # Create some helpful indexes.
-        cursor.execute('CREATE INDEX title_index ON videos(title)')
-        cursor.execute('CREATE INDEX series_index ON videos(series)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS title_index ON videos(title)')
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {SERIES_INDEX_NAME} ON videos(series, title)')
+        # This lets us fetch the episodes of a series in a date range (see search_series_by_date).
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS series_date_index ON videos(series, sortable_date)')
+        # The same video URL might be listed in several rows (e.g., under several series), so only the hash identifies a row
+        # between two loads (see _merge_rows).
+        cursor.execute(
+            f'CREATE UNIQUE INDEX IF NOT EXISTS row_hash_index ON videos({Filmliste.ROW_HASH_COLUMN_NAME})')
+
+        Filmliste.full_text_search = Filmliste._setup_full_text_search()
+
+        # This is an inverted index from the tokens of the titles (see tokenize) to the videos.
+        # Tokenizing is done in Python (see _tokenize_title), but the triggers keep the index up to date.
+        cursor.execute(
+            'CREATE TABLE IF NOT EXISTS title_tokens ('
+            'token TEXT NOT NULL, '
+            'video_id INTEGER NOT NULL, '
+            'PRIMARY KEY (token, video_id)'
+            ') WITHOUT ROWID'
+        )
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS title_tokens_video_index ON title_tokens(video_id)')
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS title_tokens_insert AFTER INSERT ON videos BEGIN '
+            'INSERT INTO title_tokens (token, video_id) SELECT value, new.rowid FROM json_each(tokenize_title(new.title)); '
+            'END'
+        )
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS title_tokens_delete AFTER DELETE ON videos BEGIN '
+            'DELETE FROM title_tokens WHERE video_id = old.rowid; '
+            'END'
+        )
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS title_tokens_update AFTER UPDATE OF title ON videos BEGIN '
+            'DELETE FROM title_tokens WHERE video_id = old.rowid; '
+            'INSERT INTO title_tokens (token, video_id) SELECT value, new.rowid FROM json_each(tokenize_title(new.title)); '
+            'END'
+        )
+
+        # The results of the searches are cached between runs (see _find_candidates).
+        cursor.execute(
+            'CREATE TABLE IF NOT EXISTS search_cache ('
+            'query TEXT PRIMARY KEY, '
+            'filmliste_version INTEGER, '
+            'depends_on_series TEXT, '
+            'candidates TEXT NOT NULL'
+            ')'
+        )
+        # The triggers collect the series whose rows change during a load (see _invalidate_search_cache).
+        # We can't use INSERT OR IGNORE here because the statements in _merge_rows override the conflict resolution of the triggers.
+        cursor.execute(
+            'CREATE TABLE IF NOT EXISTS changed_series (series TEXT PRIMARY KEY)')
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS changed_series_insert AFTER INSERT ON videos BEGIN '
+            'INSERT INTO changed_series (series) SELECT new.series WHERE NOT EXISTS (SELECT 1 FROM changed_series WHERE series IS new.series); '
+            'END'
+        )
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS changed_series_delete AFTER DELETE ON videos BEGIN '
+            'INSERT INTO changed_series (series) SELECT old.series WHERE NOT EXISTS (SELECT 1 FROM changed_series WHERE series IS old.series); '
+            'END'
+        )
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS changed_series_update AFTER UPDATE ON videos BEGIN '
+            'INSERT INTO changed_series (series) SELECT old.series WHERE NOT EXISTS (SELECT 1 FROM changed_series WHERE series IS old.series); '
+            'INSERT INTO changed_series (series) SELECT new.series WHERE NOT EXISTS (SELECT 1 FROM changed_series WHERE series IS new.series); '
+            'END'
+        )
 
         # Add the cache table.
         cursor.execute(
@@ -100,21 +309,298 @@ class Filmliste:
             ')'
         )
 
+    def _setup_full_text_search() -> bool:
+        # The substring matchers would need to scan the whole table for each search. Instead, they can use this full-text index
+        # whose trigram tokenizer supports substring search. It only references the videos table and is kept up to date by
+        # the triggers.
+        cursor = Filmliste.connection.cursor()
+        try:
+            cursor.execute(
+                'CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5('
+                'title, '
+                'series, '
+                "content='videos', "
+                "tokenize='trigram case_sensitive 1'"
+                ')'
+            )
+        except sqlite3.OperationalError:
+            # This SQLite library is too old (or compiled without FTS5). We go without the index.
+            return False
+
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS videos_fts_insert AFTER INSERT ON videos BEGIN '
+            'INSERT INTO videos_fts (rowid, title, series) VALUES (new.rowid, new.title, new.series); '
+            'END'
+        )
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS videos_fts_delete AFTER DELETE ON videos BEGIN '
+            "INSERT INTO videos_fts (videos_fts, rowid, title, series) VALUES ('delete', old.rowid, old.title, old.series); "
+            'END'
+        )
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS videos_fts_update AFTER UPDATE ON videos BEGIN '
+            "INSERT INTO videos_fts (videos_fts, rowid, title, series) VALUES ('delete', old.rowid, old.title, old.series); "
+            'INSERT INTO videos_fts (rowid, title, series) VALUES (new.rowid, new.title, new.series); '
+            'END'
+        )
+
+        return True
+
     def __init__(self) -> None:
-        if not Filmliste.connection:
-            sqlite_file = os.path.join(PERMANENTDIR, 'database.sqlite')
-            Filmliste.connection = sqlite3.connect(sqlite_file)
-            Filmliste.connection.row_factory = sqlite3.Row
-            Filmliste._setup_database()
-            self._parse_filmliste()
+        with Filmliste.write_lock:
+            if not Filmliste.connection:
+                if Filmliste.channels is None:
+                    Filmliste.channels = Filmliste._get_configured_channels()
+                # This is the only connection that writes. The searches read through their own connections.
+                Filmliste.connection = sqlite3.connect(
+                    Filmliste.DATABASE_FILENAME, check_same_thread=False)
+                Filmliste.connection.row_factory = sqlite3.Row
+                Filmliste.connection.create_function(
+                    'tokenize_title', 1, Filmliste._tokenize_title, deterministic=True)
+                Filmliste.connection.create_function(
+                    'best_video_link', 2, Filmliste._get_best_video_link, deterministic=True)
+                # In WAL mode, the readers don't block the writer and vice versa.
+                Filmliste.connection.execute('PRAGMA journal_mode = WAL')
+                Filmliste._setup_database()
+                Filmliste.connection.commit()
+                if FILMLISTE_ROW_STORE == 'raw':
+                    self._open_raw_store()
+                elif self._filmliste_has_changed():
+                    self._parse_filmliste()
+                elif Filmliste._archive_is_outdated():
+                    # Otherwise, we would search an empty (or incomplete) table and not find anything.
+                    print('The Filmliste in the database is missing or outdated. Loading it from the archive…')
+                    self._load_archive(get_archive_uri())
+                Filmliste._build_index()
+
+    def _get_read_connection() -> sqlite3.Connection:
+        # Each thread gets its own read-only connection, so that searches can run in parallel.
+        connection = getattr(Filmliste.thread_local, 'connection', None)
+        if connection is None:
+            uri = pathlib.Path(Filmliste.DATABASE_FILENAME).absolute().as_uri() + '?mode=ro'
+            # Without transactions, each statement sees what the writer has committed so far.
+            connection = sqlite3.connect(uri, uri=True, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.create_function(
+                'best_video_link', 2, Filmliste._get_best_video_link, deterministic=True)
+            Filmliste.thread_local.connection = connection
+
+        return connection
+
+    def _tokenize_title(title: str) -> str:
+        # SQLite cannot split a string into rows by itself, so we hand the tokens over as a JSON array.
+        tokens = tokenize(title) if title else set()
+        return json.dumps(sorted(tokens))
+
+    def _get_best_video_link(url: str, url_hd: str) -> str:
+        # The link is derived from the stored URLs whenever it is selected (see LINK_EXPRESSION).
+        return Filmliste._generate_best_video_link({'url': url, 'url_hd': url_hd})[1]
+
+    def update_from_archive(self, uri: str) -> None:
+        self._load_archive(uri)
+        Filmliste._build_index()
+
+    def _load_archive(self, uri: str) -> None:
+        if FILMLISTE_ROW_STORE == 'raw':
+            # The raw store needs the uncompressed file, so we write it instead of loading it into the database.
+            Filmliste._write_filmliste_file(read_archive_lines(uri))
+            self._open_raw_store()
+        else:
+            # This loads the compressed Filmliste directly from the internet without an uncompressed copy on disk.
+            self._ingest(read_archive_lines(uri))
+
+        Filmliste._set_metadata('channels', Filmliste._get_channels_key())
+        Filmliste._set_metadata('archive_uri', uri)
+        Filmliste._set_metadata(
+            'archive_loaded', round(datetime.now(tz=timezone.utc).timestamp()))
+
+        Filmliste.connection.commit()
+
+        Filmliste.loaded_archive_uri = uri
+
+    def _build_index() -> None:
+        if Filmliste.raw_store:
+            # The raw store has no other means of searching.
+            column_indexes = Filmliste._get_column_indexes(Filmliste.raw_store.header_line)
+            Filmliste.index = InMemoryIndex(
+                rows=Filmliste.raw_store.scan(column_indexes, Filmliste.channels),
+                load_rows=lambda row_ids: Filmliste._load_raw_rows(row_ids, Filmliste.CANDIDATE_COLUMNS),
+            )
+        elif FILMLISTE_IN_MEMORY_INDEX:
+            query = f'SELECT rowid, series, title, date, {LINK_EXPRESSION} AS link, link_quality FROM videos ORDER BY rowid'
+            row_id_2_candidate = {
+                row['rowid']: {column: row[column] for column in Filmliste.CANDIDATE_COLUMNS}
+                for row
+                in Filmliste.connection.execute(query)
+            }
+            Filmliste.index = InMemoryIndex(
+                rows=(
+                    (row_id, candidate['series'], candidate['title'])
+                    for row_id, candidate
+                    in row_id_2_candidate.items()
+                ),
+                load_rows=lambda row_ids: [row_id_2_candidate[row_id] for row_id in row_ids],
+            )
+
+    def _open_raw_store(self) -> None:
+        filename = os.path.join(ASSETDIR, FILMLISTE_FILENAME)
+        if not os.path.exists(filename):
+            # It has not been downloaded yet (see update_from_archive).
+            return
+
+        if self._filmliste_has_changed():
+            # The cached searches refer to the old file. We can't tell which series have changed without loading the whole file,
+            # so we forget all of them.
+            Filmliste.connection.execute('DELETE FROM search_cache')
+            Filmliste._remember_source(filename, os.stat(filename))
+            Filmliste.connection.commit()
+
+        Filmliste.raw_store = RawStore(filename)
+
+    def _write_filmliste_file(lines: Iterable[bytes]) -> None:
+        # We write to a temporary file first because the old file might still be memory-mapped.
+        filename = os.path.join(ASSETDIR, FILMLISTE_FILENAME)
+        temporary_filename = filename + '.part'
+        with open(temporary_filename, 'wb') as file:
+            for line in lines:
+                file.write(line)
+                file.write(b'\n')
+        os.replace(temporary_filename, filename)
+
+    def _load_raw_rows(row_ids: List[int], columns: List[str]) -> List[dict]:
+        # Only the rows that the matchers return are decoded. The compressed columns are taken from the store.
+        lines = [Filmliste.raw_store.get_line(row_id) for row_id in row_ids]
+        rows = list(Filmliste._decode_records(lines, Filmliste.raw_store.column_indexes))
+        for row_id, video_as_dict in zip(row_ids, rows):
+            video_as_dict['channel'] = Filmliste.raw_store.get_channel(row_id)
+            video_as_dict['series'] = Filmliste.raw_store.get_series(row_id)
+
+        rows = Filmliste._add_best_video_links(rows)
+        rows = Filmliste._add_sortable_dates(rows)
+        rows = Filmliste._discard_unplayable_rows(rows)
+
+        return [
+            {column: video_as_dict.get(column) for column in columns}
+            for video_as_dict
+            in rows
+        ]
+
+    def _get_metadata(key: str):
+        row = Filmliste.connection.execute(
+            'SELECT value FROM metadata WHERE key = :key', {'key': key}).fetchone()
+        return row['value'] if row else None
+
+    def _set_metadata(key: str, value) -> None:
+        Filmliste.connection.execute(
+            'INSERT OR REPLACE INTO metadata (key, value) VALUES (:key, :value)',
+            {'key': key, 'value': value},
+        )
+
+    def _hash_file(filename: str) -> str:
+        hasher = hashlib.sha1()
+        with open(filename, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                hasher.update(block)
+        return hasher.hexdigest()
+
+    def _filmliste_has_changed(self) -> bool:
+        # Loading the Filmliste takes quite some time, so we skip it if the file is the same as last time.
+        filename = os.path.join(ASSETDIR, FILMLISTE_FILENAME)
+        if not os.path.exists(filename):
+            # The database is filled directly from the archive (see update_from_archive).
+            return False
+
+        if Filmliste._get_metadata('channels') != Filmliste._get_channels_key():
+            # The file might be the same, but we need other rows from it.
+            return True
+
+        stat = os.stat(filename)
+
+        if stat.st_size != Filmliste._get_metadata('source_size'):
+            return True
+
+        if stat.st_mtime_ns == Filmliste._get_metadata('source_mtime'):
+            return False
+
+        # The file has been touched, but maybe its content is still the same.
+        if Filmliste._hash_file(filename) != Filmliste._get_metadata('source_hash'):
+            return True
+
+        Filmliste._set_metadata('source_mtime', stat.st_mtime_ns)
+        Filmliste.connection.commit()
+        return False
+
+    def _archive_is_outdated() -> bool:
+        # If the database is filled directly from the archive, there is no file to compare with. Instead, we check whether the
+        # archive has been loaded since the tables were last rebuilt (see _setup_database) and with the channels we need now.
+        if os.path.exists(os.path.join(ASSETDIR, FILMLISTE_FILENAME)):
+            return False
+
+        if Filmliste._get_metadata('archive_loaded') is None:
+            return True
+
+        return Filmliste._get_metadata('channels') != Filmliste._get_channels_key()
+
+    def _get_configured_channels() -> Optional[Set[str]]:
+        # The sources import the scrapers, which import this module. So, we can only import them when they are needed.
+        from sources import get_filmliste_channels
+        return get_filmliste_channels()
+
+    def _get_channels_key() -> str:
+        # This describes the loaded channels in the metadata table.
+        return json.dumps(sorted(Filmliste.channels)) if Filmliste.channels is not None else 'all'
 
     def _parse_filmliste(self):
-        lines = []
-        with open(os.path.join(ASSETDIR, FILMLISTE_FILENAME), 'r') as filmliste:
-            for line in filmliste:
-                lines.append(line)
+        filename = os.path.join(ASSETDIR, FILMLISTE_FILENAME)
+        stat = os.stat(filename)
 
-        header = json.loads(lines.pop(0))
+        with open(filename, 'rb') as filmliste:
+            if FILMLISTE_DECODING_PROCESSES > 1:
+                # Each process reads and decodes its own part of the file.
+                column_indexes = Filmliste._get_column_indexes(
+                    filmliste.readline())
+                tasks = [
+                    (filename, start, end, column_indexes)
+                    for start, end
+                    in Filmliste._split_into_byte_ranges(filmliste)
+                ]
+                rows = Filmliste._decode_in_parallel(_decode_byte_range, tasks)
+                self._merge_rows(Filmliste._finish_rows(rows))
+            else:
+                self._ingest(filmliste)
+
+        Filmliste._remember_source(filename, stat)
+
+        Filmliste.connection.commit()
+
+    def _remember_source(filename: str, stat: os.stat_result) -> None:
+        # We remember what we loaded to not load it again the next time.
+        Filmliste._set_metadata('channels', Filmliste._get_channels_key())
+        Filmliste._set_metadata('source_size', stat.st_size)
+        Filmliste._set_metadata('source_mtime', stat.st_mtime_ns)
+        Filmliste._set_metadata('source_hash', Filmliste._hash_file(filename))
+
+    def _ingest(self, lines: Iterable[bytes]) -> None:
+        # We stream the lines through a pipeline of generators (decode → decompress → hash → merge) so that memory stays
+        # constant no matter how big the Filmliste is and rows land in the database right away.
+        lines = iter(lines)
+        column_indexes = Filmliste._get_column_indexes(next(lines))
+
+        if FILMLISTE_DECODING_PROCESSES > 1:
+            tasks = (
+                (chunk, column_indexes)
+                for chunk
+                in iter(lambda: list(islice(lines, FILMLISTE_DECODING_CHUNK_SIZE)), [])
+            )
+            rows = Filmliste._decode_in_parallel(_decode_chunk, tasks)
+        else:
+            # The rows are in order here, so _finish_rows does the rest.
+            rows = Filmliste._decode_records(lines, column_indexes)
+
+        self._merge_rows(Filmliste._finish_rows(rows))
+
+    def _get_column_indexes(header_line: bytes) -> Dict[str, int]:
+        header = json.loads(header_line)
 
         # This contains for each column in the database the 0-indiced column number in the input file.
         database_column_name_2_source_file_column_index = {}
@@ -125,34 +611,90 @@ class Filmliste:
                 in Filmliste.header_lookup
                 if header_name == head
             ].pop()
+            if column_name_in_database in COLD_COLUMNS and column_name_in_database not in Filmliste.detail_columns:
+                # There is no need to decode columns that we don't store.
+                continue
             database_column_name_2_source_file_column_index[column_name_in_database] = column_index
-        database_column_name_2_source_file_column_index[Filmliste.VIDEO_LINK_COLUMN_NAME] = None
-        database_column_name_2_source_file_column_index[Filmliste.VIDEO_LINK_QUALITY_COLUMN_NAME] = None
 
-        data_to_insert = []
+        return database_column_name_2_source_file_column_index
+
+    def _split_into_byte_ranges(file) -> List[Tuple[int, int]]:
+        # We cut the rest of the file into pieces of roughly the same size. Each piece ends at the end of a line.
+        byte_ranges = []
+        start = file.tell()
+        file_size = os.fstat(file.fileno()).st_size
+        while start < file_size:
+            file.seek(min(start + FILMLISTE_DECODING_BYTE_RANGE_SIZE, file_size))
+            file.readline()
+            end = file.tell()
+            byte_ranges.append((start, end))
+            start = end
+
+        return byte_ranges
+
+    def _decode_in_parallel(function, tasks: Iterable[tuple]) -> Iterator[dict]:
+        # The tasks are decoded by a pool of processes, but we hand out the results in the original order because the
+        # decompression depends on the preceding rows. Only a few tasks are in flight at once to keep the memory consumption bounded.
+        # The processes are spawned instead of forked because other threads (e.g., those of the thumbnail pipeline) might be
+        # running, and a forked process would inherit their locks in whatever state they are.
+        with ProcessPoolExecutor(
+            max_workers=FILMLISTE_DECODING_PROCESSES,
+            mp_context=multiprocessing.get_context('spawn'),
+        ) as executor:
+            pending_results = deque()
+            for task in tasks:
+                pending_results.append(executor.submit(function, *task))
+                if len(pending_results) >= 2 * FILMLISTE_DECODING_PROCESSES:
+                    yield from pending_results.popleft().result()
+            while pending_results:
+                yield from pending_results.popleft().result()
 
+    def _finish_rows(rows: Iterable[dict]) -> Iterator[dict]:
+        # Rows that were decoded in parallel might miss their compressed columns (and thus their hash) if they are at the
+        # beginning of a chunk. Since we now see the rows in order, we can fill in the gaps.
+        rows = Filmliste._decompress_rows(rows)
+        rows = Filmliste._discard_other_channels(rows)
+        rows = Filmliste._add_row_hashes(rows)
+        return rows
+
+    def _decode_lines(lines: Iterable[bytes], column_indexes: Dict[str, int]) -> Iterator[dict]:
+        rows = Filmliste._decode_records(lines, column_indexes)
+        # If the lines are only a chunk of the Filmliste, the rows at its beginning cannot be decompressed here.
+        # They are fixed in _finish_rows.
+        rows = Filmliste._decompress_rows(rows)
+        rows = Filmliste._add_row_hashes(rows)
+        return rows
+
+    def _derive_columns(rows: Iterable[dict]) -> Iterator[dict]:
+        # This is only done for the rows that are not stored yet (see _merge_rows).
+        rows = Filmliste._add_best_video_links(rows)
+        rows = Filmliste._discard_unplayable_rows(rows)
+        rows = Filmliste._add_sortable_dates(rows)
+        return rows
+
+    def _decode_records(lines: Iterable[bytes], column_indexes: Dict[str, int]) -> Iterator[dict]:
+        for line in lines:
+            parsed_line = json.loads(line)
+
+            video_as_dict = {
+                database_column: parsed_line[original_file_index] or None
+                for database_column, original_file_index
+                in column_indexes.items()
+            }
+            video_as_dict[Filmliste.LINE_HASH_KEY] = hashlib.sha1(line.strip()).digest()
+
+            yield video_as_dict
+
+    def _decompress_rows(rows: Iterable[dict]) -> Iterator[dict]:
         # There is some weird compression performed on some columns: To save bytes, consecutive lines with the same field value are
         # compressed by having the real value only in the first occurrence and empty strings in the following lines.
         # We need to undo this here.
         current_values_for_compressed_columns = {
-            'channel': None,
-            'series': None,
+            column: None
+            for column
+            in Filmliste.COMPRESSED_COLUMNS
         }
-        for line in lines:
-            parsed_line = json.loads(line)
-
-            # parse that line
-            video_as_dict = {}
-            for database_column in Filmliste.database_columns:
-                original_file_index = database_column_name_2_source_file_column_index[
-                    database_column]
-                if original_file_index is None:
-                    # It's an artificial column. Ignore it here.
-                    pass
-                else:
-                    video_as_dict[database_column] = parsed_line[original_file_index] or None
-
-            # decompress
+        for video_as_dict in rows:
             for column in current_values_for_compressed_columns.keys():
                 current_value = video_as_dict[column]
                 if current_value:
@@ -165,43 +707,252 @@ class Filmliste:
                 # Now we need to set the value to the entry to persist it.
                 video_as_dict[column] = current_value
 
+            yield video_as_dict
+
+    def _add_best_video_links(rows: Iterable[dict]) -> Iterator[dict]:
+        for video_as_dict in rows:
             # We add the best video link for later processing. This is the absolute link with the highest video quality.
-            best_video = self._generate_best_video_link(video_as_dict)
-            if best_video[1].endswith('.m3u8'):
-                # This is not a playable video. Discard this row.
-                continue
+            best_video = Filmliste._generate_best_video_link(video_as_dict)
             video_as_dict[Filmliste.VIDEO_LINK_QUALITY_COLUMN_NAME] = best_video[0]
             video_as_dict[Filmliste.VIDEO_LINK_COLUMN_NAME] = best_video[1]
 
-            data_to_insert.append(video_as_dict)
+            yield video_as_dict
+
+    def _add_sortable_dates(rows: Iterable[dict]) -> Iterator[dict]:
+        # The dates in the source file look like DD.MM.YYYY. We turn them around once here instead of parsing them on each search.
+        for video_as_dict in rows:
+            match = DATE_PATTERN.match(video_as_dict['date'] or '')
+            if match:
+                video_as_dict['sortable_date'] = '{year}-{month}-{day}'.format(**match.groupdict())
+
+            yield video_as_dict
+
+    def _discard_unplayable_rows(rows: Iterable[dict]) -> Iterator[dict]:
+        # We must not discard rows before they have been decompressed because they might carry the value of a compressed column.
+        for video_as_dict in rows:
+            if video_as_dict[Filmliste.VIDEO_LINK_COLUMN_NAME].endswith('.m3u8'):
+                # This is not a playable video. Discard this row.
+                continue
+
+            yield video_as_dict
+
+    def _discard_other_channels(rows: Iterable[dict]) -> Iterator[dict]:
+        # Like above, this must come after the decompression.
+        if Filmliste.channels is None:
+            yield from rows
+            return
+
+        for video_as_dict in rows:
+            if video_as_dict['channel'] not in Filmliste.channels:
+                continue
 
-        insertion_cursor = Filmliste.connection.cursor()
+            yield video_as_dict
+
+    def _add_row_hashes(rows: Iterable[dict]) -> Iterator[dict]:
+        # Instead of encoding all columns once more, we hash the line from the source file together with the compressed
+        # columns, which the line might leave empty. The hash is taken before any column is derived, so that the rows that are
+        # stored already need no further work (see _merge_rows). A change in a column that we don't store makes a new row as
+        # well, which does no harm.
+        for video_as_dict in rows:
+            if video_as_dict.get(Filmliste.ROW_HASH_COLUMN_NAME):
+                # This row has been hashed already.
+                pass
+            elif all(video_as_dict[column] for column in Filmliste.COMPRESSED_COLUMNS):
+                # We can only hash rows that have been decompressed.
+                values = '\n'.join(video_as_dict[column] for column in Filmliste.COMPRESSED_COLUMNS)
+                video_as_dict[Filmliste.ROW_HASH_COLUMN_NAME] = hashlib.sha1(
+                    values.encode('utf-8') + video_as_dict[Filmliste.LINE_HASH_KEY]).hexdigest()
+
+            yield video_as_dict
+
+    def _merge_rows(self, rows: Iterable[dict]) -> None:
+        # Instead of rebuilding the table on each run, we merge the new Filmliste into the existing table:
+        # New rows are inserted, unchanged rows are left alone, and rows that are not in the new Filmliste anymore are deleted.
+        # The row hash serves as the key, so a changed row is a new row and its old version vanishes. The URL can't be the key
+        # because the same video might be listed in several rows. Rows that are exactly the same are only stored once.
+        cursor = Filmliste.connection.cursor()
         list_of_columns = ', '.join(Filmliste.database_columns)
 
         list_of_placeholders = ', '.join(
             [f':{header}' for header in Filmliste.database_columns])
-        insert_statement = f'INSERT INTO videos ({list_of_columns}) values ({list_of_placeholders})'
-        insertion_cursor.executemany(insert_statement, data_to_insert)
-        Filmliste.connection.commit()
+        insert_statement = (
+            f'INSERT OR IGNORE INTO videos ({list_of_columns}) values ({list_of_placeholders})'
+        )
+
+        # The details are only written for new and changed rows. Unchanged rows still have theirs.
+        list_of_detail_columns = ', '.join(Filmliste.detail_columns)
+        list_of_detail_placeholders = ', '.join(
+            [f':{column}' for column in Filmliste.detail_columns])
+        insert_details_statement = (
+            f'INSERT INTO video_details (video_id, {list_of_detail_columns}) '
+            f'SELECT rowid, {list_of_detail_placeholders} FROM videos '
+            f'WHERE {Filmliste.ROW_HASH_COLUMN_NAME} = :{Filmliste.ROW_HASH_COLUMN_NAME} '
+            'AND NOT EXISTS (SELECT 1 FROM video_details WHERE video_id = videos.rowid)'
+        )
+
+        # We remember which rows we have seen to find the vanished rows in the end.
+        cursor.execute('DROP TABLE IF EXISTS temp.seen_row_hashes')
+        cursor.execute('CREATE TEMPORARY TABLE seen_row_hashes (row_hash TEXT PRIMARY KEY)')
+
+        # If the table is empty (e.g., after the schema has changed), the triggers and indexes would be updated row by row.
+        # It is much faster to fill them at once in the end (see _fill_indexes). Only the row hashes need their index all along.
+        bulk_load = not cursor.execute('SELECT 1 FROM videos LIMIT 1').fetchone()
+        if bulk_load:
+            for trigger_name in Filmliste.INSERT_TRIGGER_NAMES:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger_name}')
+            for index_name in Filmliste.SECONDARY_INDEX_NAMES:
+                cursor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+        rows = iter(rows)
+        while True:
+            chunk_rows = list(islice(rows, FILMLISTE_INSERT_CHUNK_SIZE))
+            if not chunk_rows:
+                break
+            row_hashes = json.dumps([row[Filmliste.ROW_HASH_COLUMN_NAME] for row in chunk_rows])
+            cursor.execute('INSERT OR IGNORE INTO seen_row_hashes (row_hash) SELECT value FROM json_each(?)', (row_hashes,))
+
+            # Most rows are unchanged since the last load. We only derive the other columns of the new rows.
+            stored_row_hashes = {
+                row[0]
+                for row
+                in cursor.execute(
+                    f'SELECT {Filmliste.ROW_HASH_COLUMN_NAME} FROM videos '
+                    f'WHERE {Filmliste.ROW_HASH_COLUMN_NAME} IN (SELECT value FROM json_each(?))',
+                    (row_hashes,),
+                )
+            }
+            new_rows = list(Filmliste._derive_columns(
+                row
+                for row
+                in chunk_rows
+                if row[Filmliste.ROW_HASH_COLUMN_NAME] not in stored_row_hashes
+            ))
+
+            # Columns that are missing in the source file are inserted as NULL.
+            cursor.executemany(insert_statement, [
+                {column: row.get(column) for column in Filmliste.database_columns}
+                for row
+                in new_rows
+            ])
+            if Filmliste.detail_columns:
+                cursor.executemany(insert_details_statement, [
+                    {column: row.get(column) for column in [Filmliste.ROW_HASH_COLUMN_NAME] + Filmliste.detail_columns}
+                    for row
+                    in new_rows
+                ])
+
+        cursor.execute(
+            f'DELETE FROM videos WHERE {Filmliste.ROW_HASH_COLUMN_NAME} NOT IN (SELECT row_hash FROM seen_row_hashes)')
+        cursor.execute('DROP TABLE seen_row_hashes')
+
+        if bulk_load:
+            Filmliste._fill_indexes()
+
+        Filmliste._invalidate_search_cache()
+
+    def _fill_indexes() -> None:
+        # This does at once for all rows what the insert triggers do for each row. Then, it creates the triggers and indexes
+        # again. The tokens are sorted like the primary key of their table, so that they can be appended.
+        cursor = Filmliste.connection.cursor()
+        if Filmliste.full_text_search:
+            cursor.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+        cursor.execute(
+            'INSERT INTO title_tokens (token, video_id) '
+            'SELECT value, videos.rowid FROM videos, json_each(tokenize_title(videos.title)) '
+            'ORDER BY value, videos.rowid'
+        )
+        cursor.execute('INSERT OR IGNORE INTO changed_series (series) SELECT DISTINCT series FROM videos')
+        Filmliste._setup_database()
+
+    # We don't apply the full toolset on each search because that would take very long and also find a lot of false positives.
+    # Instead, we relax the matching mechanism more and more.
+    matcher_classes = [
+        OriginalTitleMatcher,
+        CleanTitleMatcher,
+        CleanTitleSubstringMatcher,
+        PrefixFreeCleanTitleSubstringMatcher,
+        PrefixFreeTokenizedCleanTitleSubsetMatcher,
+    ]
+
+    def _create_matcher(self, matcher_class, clean_title: str, original_title: str, series: str) -> Matcher:
+        return matcher_class(
+            connection=Filmliste._get_read_connection(),
+            original_title=original_title,
+            clean_title=clean_title,
+            series=series,
+            full_text_search=Filmliste.full_text_search,
+            index=Filmliste.index,
+        )
 
     def _find_candidates(self, clean_title: str, original_title: str, series: str) -> list:
-        # We don't apply the full toolset on each search because that would take very long and also find a lot of false positives.
-        # Instead, we relax the matching mechanism more and more.
-        matcher_classes = [
-            OriginalTitleMatcher,
-            CleanTitleMatcher,
-            CleanTitleSubstringMatcher,
-            PrefixFreeCleanTitleSubstringMatcher,
-            PrefixFreeTokenizedCleanTitleSubsetMatcher,
+        candidates = self._get_cached_candidates(
+            clean_title=clean_title,
+            original_title=original_title,
+            series=series,
+        )
+        if candidates is None:
+            candidates, found_with_series = self._run_cascade(
+                clean_title=clean_title,
+                original_title=original_title,
+                series=series,
+            )
+            with Filmliste.write_lock:
+                self._cache_candidates(
+                    clean_title=clean_title,
+                    original_title=original_title,
+                    series=series,
+                    candidates=candidates,
+                    found_with_series=found_with_series,
+                )
+                Filmliste.connection.commit()
+
+        return candidates
+
+    def _find_many_candidates(self, queries: List[Tuple[str, str, str]]) -> List[list]:
+        results = [
+            self._get_cached_candidates(
+                clean_title=clean_title,
+                original_title=original_title,
+                series=series,
+            )
+            for clean_title, original_title, series
+            in queries
+        ]
+
+        missing_query_ids = [
+            query_id
+            for query_id, candidates
+            in enumerate(results)
+            if candidates is None
         ]
+        cascade_results = self._run_many_cascades(
+            [queries[query_id] for query_id in missing_query_ids])
+
+        with Filmliste.write_lock:
+            for query_id, (candidates, found_with_series) in zip(missing_query_ids, cascade_results):
+                clean_title, original_title, series = queries[query_id]
+                self._cache_candidates(
+                    clean_title=clean_title,
+                    original_title=original_title,
+                    series=series,
+                    candidates=candidates,
+                    found_with_series=found_with_series,
+                )
+                results[query_id] = candidates
+            Filmliste.connection.commit()
+
+        return results
+
+    def _run_cascade(self, clean_title: str, original_title: str, series: str) -> Tuple[list, bool]:
+        # This returns the candidates and whether they were found by a matcher that filtered by series.
 
         # We need to filter once more strict, additionally by series, and then, more relaxedly, not by series.
         # The series is so powerful that we try all matchers first with series.
         # If there is no hit, we (desperately) try it without series.
         for with_series in [True, False]:
-            for matcher_class in matcher_classes:
-                matcher = matcher_class(
-                    connection=Filmliste.connection,
+            for matcher_class in Filmliste.matcher_classes:
+                matcher = self._create_matcher(
+                    matcher_class=matcher_class,
                     original_title=original_title,
                     clean_title=clean_title,
                     series=series,
@@ -209,11 +960,171 @@ class Filmliste:
                 result = matcher.filter(series_must_match=with_series)
                 if result:
                     # We are satisfied as soon as we find something.
-                    return result
+                    return result, with_series
+
+        return [], False
+
+    def _run_many_cascades(self, queries: List[Tuple[str, str, str]]) -> List[Tuple[list, bool]]:
+        # This does the same as _run_cascade, but for many queries at once: Each stage of the cascade is a single query that
+        # joins all unresolved queries with the videos. Only the queries that are still unresolved go on to the next stage.
+        if Filmliste.index or not queries:
+            # The in-memory index has no round-trips to save.
+            return [
+                self._run_cascade(
+                    clean_title=clean_title,
+                    original_title=original_title,
+                    series=series,
+                )
+                for clean_title, original_title, series
+                in queries
+            ]
+
+        cursor = Filmliste._get_read_connection().cursor()
 
-        return []
+        # The queries table holds the parameters of all matchers for each query.
+        query_parameters = []
+        for clean_title, original_title, series in queries:
+            parameters = {}
+            for matcher_class in Filmliste.matcher_classes:
+                matcher = self._create_matcher(
+                    matcher_class=matcher_class,
+                    original_title=original_title,
+                    clean_title=clean_title,
+                    series=series,
+                )
+                parameters.update(matcher.query_parameters())
+            query_parameters.append(parameters)
+        columns = sorted(set().union(*query_parameters))
 
-    def _generate_best_video_link(self, candidate: dict) -> Tuple[int, str]:
+        cursor.execute('DROP TABLE IF EXISTS temp.queries')
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE queries (id INTEGER PRIMARY KEY, {", ".join(columns)})')
+        list_of_placeholders = ', '.join([f':{column}' for column in columns])
+        cursor.executemany(
+            f'INSERT INTO queries (id, {", ".join(columns)}) VALUES (:id, {list_of_placeholders})',
+            [
+                {'id': query_id, **{column: parameters.get(column) for column in columns}}
+                for query_id, parameters
+                in enumerate(query_parameters)
+            ],
+        )
+        # This holds the IDs of the queries that are resolved by the current statement.
+        cursor.execute('DROP TABLE IF EXISTS temp.batch')
+        cursor.execute('CREATE TEMPORARY TABLE batch (id INTEGER PRIMARY KEY)')
+
+        results = [([], False) for _ in queries]
+        unresolved_query_ids = set(range(len(queries)))
+        for with_series in [True, False]:
+            for matcher_class in Filmliste.matcher_classes:
+                # The where clause of a matcher might differ between queries (e.g., if a substring is too short for the
+                # full-text index). Queries whose where clauses look the same are resolved together.
+                where_clause_2_batch = {}
+                for query_id in sorted(unresolved_query_ids):
+                    clean_title, original_title, series = queries[query_id]
+                    matcher = self._create_matcher(
+                        matcher_class=matcher_class,
+                        original_title=original_title,
+                        clean_title=clean_title,
+                        series=series,
+                    )
+                    where_clause_2_batch.setdefault(
+                        matcher.bulk_where_clause(series_must_match=with_series), []).append((query_id, matcher))
+
+                for where_clause, batch in where_clause_2_batch.items():
+                    cursor.execute('DELETE FROM batch')
+                    cursor.executemany(
+                        'INSERT INTO batch (id) VALUES (?)', [(query_id,) for query_id, _ in batch])
+
+                    # The CROSS JOINs make SQLite go through the queries first and look up the videos for each of them.
+                    # If the series must match, only the rows of the query's series are looked at (see Matcher.filter).
+                    statement = (
+                        f'SELECT queries.id AS query_id, videos.series, videos.title, videos.date, {LINK_EXPRESSION} AS link, videos.link_quality '
+                        'FROM batch CROSS JOIN queries ON queries.id = batch.id CROSS JOIN videos '
+                    )
+                    statement += f'INDEXED BY {SERIES_INDEX_NAME} ' if with_series else ''
+                    statement += f'WHERE {where_clause}'
+                    statement += ' AND videos.series = queries.series' if with_series else ''
+                    statement += ' ORDER BY queries.id, videos.rowid'
+
+                    query_id_2_rows = group_by(
+                        items=cursor.execute(statement).fetchall(),
+                        criterion=lambda row: row['query_id'],
+                    )
+                    for query_id, matcher in batch:
+                        # The query ID is only needed for the grouping. The rows look like those of _run_cascade.
+                        rows = matcher.additional_filter([
+                            {column: row[column] for column in Filmliste.CANDIDATE_COLUMNS}
+                            for row
+                            in query_id_2_rows.get(query_id, [])
+                        ])
+                        if rows:
+                            # We are satisfied as soon as we find something.
+                            results[query_id] = (rows, with_series)
+                            unresolved_query_ids.remove(query_id)
+
+        cursor.execute('DROP TABLE batch')
+        cursor.execute('DROP TABLE queries')
+
+        return results
+
+    def _get_search_cache_key(clean_title: str, original_title: str, series: str) -> str:
+        return json.dumps([clean_title, original_title, series])
+
+    def _get_cached_candidates(self, clean_title: str, original_title: str, series: str) -> list:
+        # This returns None if there is no valid cache entry.
+        select_query = (
+            'SELECT candidates FROM search_cache WHERE query = :query '
+            "AND filmliste_version IS (SELECT value FROM metadata WHERE key = 'filmliste_version')"
+        )
+        parameters = {
+            'query': Filmliste._get_search_cache_key(clean_title, original_title, series),
+        }
+
+        row = Filmliste._get_read_connection().execute(select_query, parameters).fetchone()
+
+        return json.loads(row['candidates']) if row else None
+
+    def _cache_candidates(self, clean_title: str, original_title: str, series: str, candidates: list, found_with_series: bool) -> None:
+        # If the candidates were found by a matcher that filtered by series, they only depend on the rows of this series.
+        # Otherwise, they depend on the whole Filmliste.
+        insert_query = (
+            'INSERT OR REPLACE INTO search_cache (query, filmliste_version, depends_on_series, candidates) '
+            'VALUES (:query, :filmliste_version, :depends_on_series, :candidates)'
+        )
+        parameters = {
+            'query': Filmliste._get_search_cache_key(clean_title, original_title, series),
+            'filmliste_version': Filmliste._get_metadata('filmliste_version'),
+            'depends_on_series': series if found_with_series else None,
+            'candidates': json.dumps([
+                {column: candidate[column] for column in Filmliste.CANDIDATE_COLUMNS}
+                for candidate
+                in candidates
+            ]),
+        }
+
+        Filmliste.connection.execute(insert_query, parameters)
+
+    def _invalidate_search_cache() -> None:
+        # The triggers have collected the series whose rows changed during this load. Only the cached searches that depend on
+        # them are invalid now. All others are still valid for the new version of the Filmliste.
+        cursor = Filmliste.connection.cursor()
+        if not cursor.execute('SELECT series FROM changed_series LIMIT 1').fetchone():
+            return
+
+        filmliste_version = (Filmliste._get_metadata('filmliste_version') or 0) + 1
+        Filmliste._set_metadata('filmliste_version', filmliste_version)
+
+        cursor.execute(
+            'DELETE FROM search_cache '
+            'WHERE depends_on_series IS NULL OR depends_on_series IN (SELECT series FROM changed_series)'
+        )
+        cursor.execute(
+            'UPDATE search_cache SET filmliste_version = :filmliste_version',
+            {'filmliste_version': filmliste_version},
+        )
+        cursor.execute('DELETE FROM changed_series')
+
+    def _generate_best_video_link(candidate: dict) -> Tuple[int, str]:
         link = candidate['url']
         # Try the quality links descendingly.
         # Medium seems to always exist, so we start with that and try to upgrade to High afterwards.
@@ -238,51 +1149,234 @@ class Filmliste:
             original_title=original_title,
             series=series,
         )
+        links_work = self.check_links([candidate['link'] for candidate in candidates])
+
+        return self._check_candidates(candidates, links_work)
+
+    def search_many(self, queries: List[Tuple[str, str, str]]) -> List[list]:
+        # Each query is a tuple (clean_title, original_title, series) with the same meaning as the parameters of search.
+        # The result contains the candidates for each query in the same order.
+        candidate_lists = self._find_many_candidates(queries)
+
+        # We check the links of all queries at once.
+        links_work = self.check_links([
+            candidate['link']
+            for candidates
+            in candidate_lists
+            for candidate
+            in candidates
+        ])
+
+        return [self._check_candidates(candidates, links_work) for candidates in candidate_lists]
+
+    def search_ranked(self, clean_title: str, original_title: str = None, series: str = None) -> Iterator[dict]:
+        # This finds the same candidates as search, but checks them lazily, best quality first. If only the best working
+        # candidate is needed, this saves checking all the others.
+        candidates = self._find_candidates(
+            clean_title=clean_title,
+            original_title=original_title,
+            series=series,
+        )
+
+        return self._iterate_working_candidates(candidates)
+
+    def search_many_ranked(self, queries: List[Tuple[str, str, str]]) -> List[Iterator[dict]]:
+        # This is to search_many what search_ranked is to search.
+        candidate_lists = [
+            Filmliste._rank_candidates(candidates)
+            for candidates
+            in self._find_many_candidates(queries)
+        ]
+
+        # Usually, the best candidate works. So, we check the best candidate of all queries at once, and only go on with the
+        # others of a query if it is broken.
+        links_work = self.check_links([candidates[0]['link'] for candidates in candidate_lists if candidates])
+
+        return [self._iterate_working_candidates(candidates, links_work) for candidates in candidate_lists]
+
+    def search_series_by_date(self, series: str, since: date = None, until: date = None) -> list:
+        # This returns the episodes of a series between two dates (both inclusive), oldest first. It is meant for series like
+        # daily news whose episodes are told apart by their date rather than by their title.
+        # The candidates have the additional column sortable_date (see _add_sortable_dates).
+        since = since.isoformat() if since else None
+        until = until.isoformat() if until else None
+
+        if Filmliste.raw_store:
+            row_ids = sorted(Filmliste.index.series_2_row_ids.get(series, []))
+            candidates = [
+                candidate
+                for candidate
+                in Filmliste._load_raw_rows(row_ids, Filmliste.CANDIDATE_COLUMNS + ['sortable_date'])
+                if Filmliste._is_in_date_range(candidate['sortable_date'], since, until)
+            ]
+            candidates.sort(key=lambda candidate: candidate['sortable_date'] or '')
+        else:
+            query = (
+                f'SELECT series, title, date, {LINK_EXPRESSION} AS link, link_quality, sortable_date FROM videos '
+                'INDEXED BY series_date_index WHERE series = :series'
+            )
+            query += ' AND sortable_date >= :since' if since else ''
+            query += ' AND sortable_date <= :until' if until else ''
+            query += ' ORDER BY sortable_date, utc_timestamp'
+            parameters = {
+                'series': series,
+                'since': since,
+                'until': until,
+            }
+            candidates = [
+                dict(row)
+                for row
+                in Filmliste._get_read_connection().execute(query, parameters)
+            ]
+
+        links_work = self.check_links([candidate['link'] for candidate in candidates])
+
+        return [candidate for candidate in candidates if links_work[candidate['link']]]
+
+    def _is_in_date_range(sortable_date: str, since: str, until: str) -> bool:
+        # Like in SQL, rows without a date are only in the range if it has no bounds.
+        if since and (not sortable_date or sortable_date < since):
+            return False
+        if until and (not sortable_date or sortable_date > until):
+            return False
+        return True
+
+    def _rank_candidates(candidates: list) -> list:
+        # The best quality comes first.
+        return sorted(candidates, key=lambda x: x['link_quality'], reverse=True)
+
+    def _iterate_working_candidates(self, candidates: list, links_work: Dict[str, bool] = None) -> Iterator[dict]:
+        # The links that are not in links_work yet are checked when they are reached. Then, we check all remaining links at
+        # once because the next one is likely to be needed as well if one is broken.
+        candidates = Filmliste._rank_candidates(candidates)
+        links_work = dict(links_work or {})
+        for position, candidate in enumerate(candidates):
+            uri = candidate['link']
+            if uri not in links_work:
+                links_work.update(self.check_links([
+                    remaining_candidate['link']
+                    for remaining_candidate
+                    in candidates[position:]
+                    if remaining_candidate['link'] not in links_work
+                ]))
+            if links_work[uri]:
+                yield candidate
 
+    def _check_candidates(self, candidates: list, links_work: Dict[str, bool]) -> list:
         # rank by best video link
         candidates.sort(key=lambda x: x['link_quality'])
 
         # Some videos don't work even though they look good. We need to check them (and cache the result).
         # Those that don't work are filtered out.
         candidates = list(
-            filter(lambda candidate: self.video_works(candidate), candidates)
+            filter(lambda candidate: links_work[candidate['link']], candidates)
         )
 
         return candidates
 
     def video_works(self, candidate) -> bool:
-
-        # Get cached value for candidate.
-        cursor = self.connection.cursor()
-
         uri = candidate['link']
-        bad_before_this_time = round(
-            (datetime.now(tz=timezone.utc) - MAX_CACHE_AGE).timestamp())
+        return self.check_links([uri])[uri]
 
-        select_query = 'SELECT works FROM cache WHERE uri = :uri AND last_checked > :some_time_ago'
+    def check_links(self, uris: List[str]) -> Dict[str, bool]:
+        # Get cached values for the links. Expired values are used anyway, but checked again in the background for the next
+        # run. So, we only wait for the network for links that we have never checked before.
+        cursor = Filmliste._get_read_connection().cursor()
+
+        now = datetime.now(tz=timezone.utc)
         parameters = {
-            'uri': uri,
-            'some_time_ago': bad_before_this_time
+            'working_before_this_time_is_expired': round((now - MAX_CACHE_AGE_WORKING).timestamp()),
+            'broken_before_this_time_is_expired': round((now - MAX_CACHE_AGE_BROKEN).timestamp()),
         }
 
-        row = cursor.execute(select_query, parameters).fetchone()
+        cursor.execute('DROP TABLE IF EXISTS temp.checked_uris')
+        cursor.execute('CREATE TEMPORARY TABLE checked_uris (uri TEXT PRIMARY KEY)')
+        cursor.executemany(
+            'INSERT OR IGNORE INTO checked_uris (uri) VALUES (:uri)',
+            [{'uri': uri} for uri in uris],
+        )
+
+        select_query = (
+            'SELECT cache.uri, cache.works, '
+            'CASE WHEN cache.works '
+            'THEN cache.last_checked <= :working_before_this_time_is_expired '
+            'ELSE cache.last_checked <= :broken_before_this_time_is_expired '
+            'END AS expired '
+            'FROM checked_uris '
+            'JOIN cache ON cache.uri = checked_uris.uri'
+        )
+
+        links_work = {}
+        expired_uris = []
+        for row in cursor.execute(select_query, parameters):
+            links_work[row['uri']] = bool(row['works'])
+            if row['expired']:
+                expired_uris.append(row['uri'])
+        cursor.execute('DROP TABLE checked_uris')
+
+        # For the links without an entry, get fresh information from the internet.
+        # All of them are checked concurrently and written to the cache in one transaction.
+        unknown_uris = [uri for uri in uris if uri not in links_work]
+        if unknown_uris:
+            fresh_links_work = Filmliste._get_link_checker().check(unknown_uris)
+            with Filmliste.write_lock:
+                Filmliste._cache_links(Filmliste.connection.cursor(), fresh_links_work)
+                Filmliste.connection.commit()
+            links_work.update(fresh_links_work)
 
-        if row:
-            return row['works']
+        with Filmliste.write_lock:
+            expired_uris = [uri for uri in expired_uris if uri not in Filmliste.revalidating_uris]
+            Filmliste.revalidating_uris.update(expired_uris)
+        if expired_uris:
+            Filmliste._get_revalidation_executor().submit(Filmliste._revalidate_links, expired_uris)
 
-        # Apparently, there was no entry (or it was too old). Get fresh information from the internet.
-        response = requests.head(uri)
+        return links_work
 
-        works = response.status_code == 200
+    def _get_link_checker() -> LinkChecker:
+        with Filmliste.write_lock:
+            if not Filmliste.link_checker:
+                Filmliste.link_checker = LinkChecker()
+        return Filmliste.link_checker
 
+    def _get_revalidation_executor() -> ThreadPoolExecutor:
+        with Filmliste.write_lock:
+            if not Filmliste.revalidation_executor:
+                Filmliste.revalidation_executor = ThreadPoolExecutor(max_workers=1)
+        return Filmliste.revalidation_executor
+
+    def _cache_links(cursor: sqlite3.Cursor, links_work: Dict[str, bool]) -> None:
         insert_query = 'INSERT OR REPLACE INTO cache (uri, works, last_checked) VALUES (:uri, :works, :last_checked)'
-        parameters = {
-            'uri': uri,
-            'works': works,
-            'last_checked': round(datetime.now(tz=timezone.utc).timestamp())
-        }
+        last_checked = round(datetime.now(tz=timezone.utc).timestamp())
+        cursor.executemany(insert_query, [
+            {
+                'uri': uri,
+                'works': works,
+                'last_checked': last_checked,
+            }
+            for uri, works
+            in links_work.items()
+        ])
+
+    def _revalidate_links(uris: List[str]) -> None:
+        # This runs in the background worker. SQLite connections can't be shared between threads, so it has its own.
+        # We wait patiently for the main thread to release the database.
+        links_work = Filmliste._get_link_checker().check(uris)
+
+        connection = sqlite3.connect(Filmliste.DATABASE_FILENAME, timeout=60)
+        with connection:
+            Filmliste._cache_links(connection.cursor(), links_work)
+        connection.close()
+
+
+# These functions are run in the worker processes of the parallel decoding (see Filmliste._decode_in_parallel).
+# Therefore, they need to be defined on module level.
+
+def _decode_chunk(lines: List[bytes], column_indexes: Dict[str, int]) -> List[dict]:
+    return list(Filmliste._decode_lines(lines, column_indexes))
 
-        cursor.execute(insert_query, parameters)
-        self.connection.commit()
 
-        return works
+def _decode_byte_range(filename: str, start: int, end: int, column_indexes: Dict[str, int]) -> List[dict]:
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        lines = file.read(end - start).splitlines()
+    return _decode_chunk(lines, column_indexes)
@@ -0,0 +1,94 @@
+from array import array
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from filmliste.matchers.prefixfreetokenizedcleantitlesubsetmatcher import \
+    tokenize
+
+# The substring index consists of all substrings of that length.
+NGRAM_LENGTH = 3
+
+
+def get_ngrams(string: str) -> Set[str]:
+    return {string[i:i + NGRAM_LENGTH] for i in range(len(string) - NGRAM_LENGTH + 1)}
+
+
+class InMemoryIndex:
+
+    # This holds the titles of the Filmliste in memory, together with some indexes.
+    # It answers the same questions as the SQL queries of the matchers, but without a round-trip to SQLite.
+    # Building it takes some time and memory, so it is only worth it if there are many searches (see FILMLISTE_IN_MEMORY_INDEX).
+    # The rows themselves are loaded by load_rows, which gets sorted row IDs and returns the candidates for them.
+
+    def __init__(
+        self,
+        rows: Iterable[Tuple[int, str, str]],
+        load_rows: Callable[[List[int]], List[dict]],
+    ) -> None:
+        self.load_rows = load_rows
+        self.titles: Dict[int, str] = {}
+        self.title_2_row_ids: Dict[str, List[int]] = {}
+        self.series_2_row_ids: Dict[str, Set[int]] = {}
+        # The posting lists are arrays of row IDs because sets would take way too much memory.
+        self.ngram_2_row_ids: Dict[str, array] = {}
+        self.token_2_row_ids: Dict[str, array] = {}
+
+        # The rows are (row ID, series, title), ordered by row ID.
+        for row_id, series, title in rows:
+            self.titles[row_id] = title
+
+            self.series_2_row_ids.setdefault(series, set()).add(row_id)
+
+            if title is None:
+                continue
+
+            self.title_2_row_ids.setdefault(title, []).append(row_id)
+            for ngram in get_ngrams(title):
+                self.ngram_2_row_ids.setdefault(ngram, array('I')).append(row_id)
+            for token in tokenize(title):
+                self.token_2_row_ids.setdefault(token, array('I')).append(row_id)
+
+    def rows_with_title(self, title: str) -> Iterable[int]:
+        return self.title_2_row_ids.get(title, [])
+
+    def rows_containing(self, substring: str) -> Iterable[int]:
+        ngrams = get_ngrams(substring)
+        if ngrams:
+            # We only need to look at the rows of the rarest n-gram of the substring.
+            posting_lists = [self.ngram_2_row_ids.get(ngram, []) for ngram in ngrams]
+            candidates = min(posting_lists, key=len)
+        else:
+            # The substring is too short for the index.
+            candidates = self.titles.keys()
+
+        return [
+            row_id
+            for row_id
+            in candidates
+            if self.titles[row_id] is not None and substring in self.titles[row_id]
+        ]
+
+    def rows_with_tokens(self, tokens: Set[str]) -> Iterable[int]:
+        # These are the rows whose titles contain all the tokens. We start with the rarest token.
+        posting_lists = sorted(
+            [self.token_2_row_ids.get(token, []) for token in tokens],
+            key=len,
+        )
+        if not posting_lists:
+            # Without any tokens, there is nothing to match.
+            return []
+
+        row_ids = set(posting_lists[0])
+        for posting_list in posting_lists[1:]:
+            row_ids.intersection_update(posting_list)
+            if not row_ids:
+                break
+
+        return row_ids
+
+    def restrict_to_series(self, row_ids: Iterable[int], series: str) -> Iterable[int]:
+        series_row_ids = self.series_2_row_ids.get(series, set())
+        return [row_id for row_id in row_ids if row_id in series_row_ids]
+
+    def get_rows(self, row_ids: Iterable[int]) -> List[dict]:
+        # We return them in the same order as SQLite would do.
+        return self.load_rows(sorted(row_ids))
@@ -0,0 +1,58 @@
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, zip_longest
+from typing import Dict, Iterable, List
+from urllib.parse import urlsplit
+
+import requests
+from constants import (LINK_CHECK_REQUESTS_PER_SECOND_PER_HOST,
+                       LINK_CHECK_THREADS, LINK_CHECK_THREADS_PER_HOST)
+from tools.http_client import HttpClient
+from tools.misc import group_by
+
+
+class LinkChecker:
+
+    def __init__(self) -> None:
+        # The client keeps the connections alive, so each host is only connected to once per thread.
+        self.http_client = HttpClient(
+            requests_per_second=LINK_CHECK_REQUESTS_PER_SECOND_PER_HOST,
+            burst=LINK_CHECK_THREADS_PER_HOST,
+            pool_size=LINK_CHECK_THREADS,
+        )
+
+        # We don't want to hammer a single host with all threads at once.
+        self.host_semaphores = defaultdict(
+            lambda: threading.BoundedSemaphore(LINK_CHECK_THREADS_PER_HOST))
+        self.host_semaphores_lock = threading.Lock()
+
+    def check(self, uris: Iterable[str]) -> Dict[str, bool]:
+        # We interleave the hosts so that the threads are not all waiting for the same host.
+        uris = LinkChecker._interleave_hosts(set(uris))
+
+        with ThreadPoolExecutor(max_workers=LINK_CHECK_THREADS) as executor:
+            return dict(zip(uris, executor.map(self._check_one, uris)))
+
+    def _interleave_hosts(uris: Iterable[str]) -> List[str]:
+        uris_by_host = group_by(sorted(uris), lambda uri: urlsplit(uri).netloc)
+
+        return [
+            uri
+            for uri
+            in chain.from_iterable(zip_longest(*uris_by_host.values()))
+            if uri is not None
+        ]
+
+    def _check_one(self, uri: str) -> bool:
+        with self.host_semaphores_lock:
+            semaphore = self.host_semaphores[urlsplit(uri).netloc]
+
+        with semaphore:
+            try:
+                response = self.http_client.head(uri)
+            except requests.RequestException:
+                # The host can't be reached (or doesn't answer in time). A single link must not fail all the others.
+                return False
+
+        return response.status_code == 200
@@ -1,3 +1,5 @@
+from typing import Iterable
+
 from filmliste.matchers.matcher import Matcher
 
 
@@ -8,3 +10,6 @@ class CleanTitleMatcher(Matcher):
 
     def where_clause(self) -> str:
         return 'title = :clean_title'
+
+    def in_memory_candidates(self) -> Iterable[int]:
+        return self.index.rows_with_title(self.clean_title)
@@ -1,3 +1,5 @@
+from typing import Iterable
+
 from filmliste.matchers.matcher import Matcher
 
 
@@ -7,4 +9,10 @@ class CleanTitleSubstringMatcher(Matcher):
         super(self.__class__, self).__init__(*args, **kwargs)
 
     def where_clause(self) -> str:
-        return 'instr(title, :clean_title) > 0'
+        return self.substring_clause('clean_title')
+
+    def series_where_clause(self) -> str:
+        return self.substring_clause('clean_title', full_text_search=False)
+
+    def in_memory_candidates(self) -> Iterable[int]:
+        return self.index.rows_containing(self.clean_title)
@@ -1,14 +1,42 @@
+import re
 import sqlite3
-from typing import List
+from typing import Iterable, List
+
+
+# The trigram index can only find substrings that are at least that long.
+MINIMUM_FULL_TEXT_SEARCH_LENGTH = 3
+
+# This index on (series, title) lets the series-restricted searches look at the rows of one series only.
+SERIES_INDEX_NAME = 'series_title_index'
+
+# The video link is not stored, but derived from the URL and the compact HD suffix (see Filmliste._get_best_video_link).
+LINK_EXPRESSION = 'best_video_link(videos.url, videos.url_hd)'
+
+
+def get_full_text_query(string: str) -> str:
+    # We search the string as a phrase in the title column. Quotes inside the phrase are escaped by doubling them.
+    escaped_string = string.replace('"', '""')
+    return f'title : "{escaped_string}"'
 
 
 class Matcher:
 
-    def __init__(self, connection: sqlite3.Connection, original_title: str, clean_title: str, series: str = None) -> None:
+    def __init__(
+        self,
+        connection: sqlite3.Connection,
+        original_title: str,
+        clean_title: str,
+        series: str = None,
+        full_text_search: bool = False,
+        index=None,
+    ) -> None:
         self.original_title = original_title
         self.clean_title = clean_title
         self.connection = connection
         self.series = series
+        self.full_text_search = full_text_search
+        # If there is an in-memory index (see InMemoryIndex), we use that instead of SQLite.
+        self.index = index
 
     def parameters(self) -> dict:
         return {
@@ -17,16 +45,67 @@ class Matcher:
             'series': self.series,
         }
 
+    def query_parameters(self) -> dict:
+        parameters = self.parameters()
+        # Each parameter can also be used as a full-text query (see substring_clause).
+        parameters.update({
+            f'{name}_full_text_query': get_full_text_query(value)
+            for name, value
+            in parameters.items()
+            if isinstance(value, str)
+        })
+        return parameters
+
+    def series_where_clause(self) -> str:
+        # This is used instead of where_clause if the series must match. Then, SQLite looks at the rows of the series first (see
+        # filter), and the where clause should not make it look anywhere else.
+        return self.where_clause()
+
+    def bulk_where_clause(self, series_must_match: bool = False) -> str:
+        # When many searches are resolved at once (see Filmliste.search_many), the parameters are not bound to the query
+        # but are columns of the temporary queries table.
+        where_clause = self.series_where_clause() if series_must_match else self.where_clause()
+        return re.sub(pattern=r':(\w+)', repl=r'queries.\1', string=where_clause)
+
+    def substring_clause(self, parameter_name: str, full_text_search: bool = True) -> str:
+        clause = f'instr(title, :{parameter_name}) > 0'
+
+        substring = self.parameters()[parameter_name]
+        if full_text_search and self.full_text_search and len(substring) >= MINIMUM_FULL_TEXT_SEARCH_LENGTH:
+            # instr() alone would need to look at every row. The full-text index finds the candidates much quicker.
+            clause = (
+                f'videos.rowid IN (SELECT rowid FROM videos_fts WHERE videos_fts MATCH :{parameter_name}_full_text_query) '
+                f'AND {clause}'
+            )
+
+        return clause
+
     def additional_filter(self, rows: list) -> list:
         return rows
 
+    def in_memory_candidates(self) -> Iterable[int]:
+        # This returns the IDs of exactly those rows that the where clause and the additional filter would let through,
+        # but looked up in the in-memory index.
+        raise NotImplementedError
+
     def filter(self, series_must_match: bool = False) -> List:
+        if self.index:
+            row_ids = self.in_memory_candidates()
+            if series_must_match:
+                row_ids = self.index.restrict_to_series(row_ids, self.series)
+            return self.index.get_rows(row_ids)
+
         cursor = self.connection.cursor()
-        query = f'SELECT series, title, date, link, link_quality FROM videos WHERE '
-        query += self.where_clause()
-        query += ' AND series = :series' if series_must_match else ''
+        if series_must_match:
+            # The rows of one series are few, so we go through them instead of searching all rows.
+            query = f'SELECT series, title, date, {LINK_EXPRESSION} AS link, link_quality FROM videos INDEXED BY {SERIES_INDEX_NAME} WHERE '
+            query += self.series_where_clause()
+            query += ' AND series = :series'
+        else:
+            query = f'SELECT series, title, date, {LINK_EXPRESSION} AS link, link_quality FROM videos WHERE '
+            query += self.where_clause()
 
-        parameters = self.parameters()
+        parameters = self.query_parameters()
         rows = cursor.execute(query, parameters).fetchall()
 
         rows = self.additional_filter(rows)
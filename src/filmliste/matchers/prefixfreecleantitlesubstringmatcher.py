@@ -1,4 +1,7 @@
+from typing import Iterable
+
 from filmliste.matchers.matcher import Matcher
+from filmliste.normalization import remove_prefix
 
 
 class PrefixFreeCleanTitleSubstringMatcher(Matcher):
@@ -7,13 +10,17 @@ class PrefixFreeCleanTitleSubstringMatcher(Matcher):
         super(self.__class__, self).__init__(*args, **kwargs)
 
     def where_clause(self) -> str:
-        return 'instr(title, :prefix_free_clean_title) > 0'
+        return self.substring_clause('prefix_free_clean_title')
+
+    def series_where_clause(self) -> str:
+        return self.substring_clause('prefix_free_clean_title', full_text_search=False)
+
+    def in_memory_candidates(self) -> Iterable[int]:
+        return self.index.rows_containing(self.parameters()['prefix_free_clean_title'])
 
     def parameters(self) -> dict:
         parameters = super().parameters()
 
-        # The prefix could be a “Spezial: ” prefix that we want to get rid of.
-        parameters['prefix_free_clean_title'] = \
-            self.clean_title.split(':').pop().strip()
+        parameters['prefix_free_clean_title'] = remove_prefix(self.clean_title)
 
         return parameters
@@ -1,40 +1,58 @@
+import json
 import re
-from typing import Set
+from typing import Iterable, Set
+
 from filmliste.matchers.matcher import Matcher
+from filmliste.normalization import remove_prefix
+
+NON_LETTER_PATTERN = re.compile('[^a-z ]')
 
 
 def tokenize(string: str) -> Set[str]:
-    return set(re.compile('[^a-z ]').sub(string=string.lower(), repl=' ').split(' '))
+    tokens = NON_LETTER_PATTERN.sub(string=string.lower(), repl=' ').split(' ')
+    # Consecutive non-letters leave empty tokens behind.
+    return {token for token in tokens if token}
 
 
 class PrefixFreeTokenizedCleanTitleSubsetMatcher(Matcher):
 
-    # The tokens from the prefix-free cleaned title must appear in the tokens from the entry's title.
+    # The tokens from the prefix-free cleaned title must appear in the tokens from the entry's title, and the title must contain
+    # the prefix-free cleaned title.
+    # The tokens of the titles are stored in the title_tokens table when the Filmliste is loaded. The substring is checked first
+    # (with the full-text index, if possible) because it narrows the rows down much more than the tokens. Only for the remaining
+    # rows, we count the tokens that they have.
 
     def __init__(self, *args, **kwargs) -> None:
         super(self.__class__, self).__init__(*args, **kwargs)
-        self.prefix_free_clean_title = self.clean_title.split(
-            ':').pop().strip()
+        self.prefix_free_clean_title = remove_prefix(self.clean_title)
         self.tokenized_prefix_free_clean_title = tokenize(
             self.prefix_free_clean_title)
 
     def where_clause(self) -> str:
-        return 'instr(title, :prefix_free_clean_title) > 0'
+        return self.subset_clause(self.substring_clause('prefix_free_clean_title'))
+
+    def series_where_clause(self) -> str:
+        return self.subset_clause(self.substring_clause('prefix_free_clean_title', full_text_search=False))
+
+    def subset_clause(self, substring_clause: str) -> str:
+        return (
+            f'{substring_clause} '
+            'AND json_array_length(:prefix_free_clean_title_tokens) > 0 '
+            'AND ('
+            'SELECT count(*) FROM title_tokens '
+            'WHERE video_id = videos.rowid AND token IN (SELECT value FROM json_each(:prefix_free_clean_title_tokens))'
+            ') = json_array_length(:prefix_free_clean_title_tokens)'
+        )
 
     def parameters(self) -> dict:
         parameters = super().parameters()
 
-        # The prefix could be a “Spezial: ” prefix that we want to get rid of.
-        parameters['prefix_free_clean_title'] = \
-            self.clean_title.split(':').pop().strip()
+        parameters['prefix_free_clean_title'] = remove_prefix(self.clean_title)
+        parameters['prefix_free_clean_title_tokens'] = json.dumps(
+            sorted(self.tokenized_prefix_free_clean_title))
 
         return parameters
 
-    def additional_filter(self, rows: list) -> list:
-        result = []
-        for row in rows:
-            tokenized_title_from_database = tokenize(row['title'])
-            if self.tokenized_prefix_free_clean_title.issubset(tokenized_title_from_database):
-                result.append(row)
-
-        return result
+    def in_memory_candidates(self) -> Iterable[int]:
+        row_ids = self.index.rows_with_tokens(self.tokenized_prefix_free_clean_title)
+        return set(row_ids).intersection(self.index.rows_containing(self.prefix_free_clean_title))
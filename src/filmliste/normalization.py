@@ -0,0 +1,3 @@
+def remove_prefix(title: str) -> str:
+    # The prefix could be a “Spezial: ” or “Folge 12: ” prefix that we want to get rid of.
+    return title.split(':').pop().strip()
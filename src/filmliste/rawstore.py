@@ -0,0 +1,105 @@
+import json
+import mmap
+import re
+from array import array
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# If the first columns are channel, series and title (which they usually are), we read them from the beginning of the line
+# instead of decoding the whole line.
+LINE_PREFIX_PATTERN = re.compile(
+    rb'\[\s*"((?:[^"\\]|\\.)*)"\s*,\s*"((?:[^"\\]|\\.)*)"\s*,\s*"((?:[^"\\]|\\.)*)"')
+LINE_PREFIX_COLUMNS = ['channel', 'series', 'title']
+
+
+def decode_string(raw_string: bytes) -> str:
+    if b'\\' in raw_string:
+        # Only escaped strings need the JSON decoder.
+        return json.loads(b'"' + raw_string + b'"')
+    return raw_string.decode('utf-8')
+
+
+class RawStore:
+
+    # This keeps filmliste.txt as it is and memory-maps it. Instead of the rows, it only holds where each row starts and the ids
+    # of its channel and series (which are compressed in the file, see Filmliste._decompress_rows). The other columns of a row
+    # are decoded on demand (see Filmliste._load_raw_rows).
+
+    def __init__(self, filename: str) -> None:
+        self.file = open(filename, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.header_end = self.data.find(b'\n')
+        self.header_line = self.data[:self.header_end]
+        self.column_indexes: Dict[str, int] = {}
+
+        self.offsets = array('Q')
+        self.channel_ids = array('H')
+        self.series_ids = array('I')
+        self.channel_names: List[str] = []
+        self.series_names: List[str] = []
+
+    def scan(self, column_indexes: Dict[str, int], channels: Optional[Set[str]] = None) -> Iterator[Tuple[int, str, str]]:
+        # This goes through the file once and returns (row ID, series, title) for each row on the way, so that an index can be
+        # built from it (see InMemoryIndex). Rows of channels that are not in channels are skipped.
+        # The column indexes are kept to decode the rows later.
+        self.column_indexes = column_indexes
+        use_line_prefix = all(
+            column_indexes.get(column) == column_index
+            for column_index, column
+            in enumerate(LINE_PREFIX_COLUMNS)
+        )
+        channel_name_2_id = {}
+        series_name_2_id = {}
+        channel = None
+        series = None
+
+        start = self.header_end + 1
+        while start < len(self.data):
+            end = self.data.find(b'\n', start)
+            if end == -1:
+                end = len(self.data)
+
+            # The pattern does not match if, e.g., the title is null.
+            match = LINE_PREFIX_PATTERN.match(self.data, start, end) if use_line_prefix else None
+            if match:
+                raw_channel, raw_series, raw_title = match.groups()
+                current_channel = decode_string(raw_channel)
+                current_series = decode_string(raw_series)
+                title = decode_string(raw_title)
+            else:
+                parsed_line = json.loads(self.data[start:end])
+                current_channel = parsed_line[column_indexes['channel']]
+                current_series = parsed_line[column_indexes['series']]
+                title = parsed_line[column_indexes['title']]
+
+            # Empty values are compressed. They mean the same as in the row above.
+            channel = current_channel or channel
+            series = current_series or series
+
+            if channels is None or channel in channels:
+                if channel not in channel_name_2_id:
+                    channel_name_2_id[channel] = len(self.channel_names)
+                    self.channel_names.append(channel)
+                if series not in series_name_2_id:
+                    series_name_2_id[series] = len(self.series_names)
+                    self.series_names.append(series)
+
+                row_id = len(self.offsets)
+                self.offsets.append(start)
+                self.channel_ids.append(channel_name_2_id[channel])
+                self.series_ids.append(series_name_2_id[series])
+
+                yield row_id, series, title or None
+
+            start = end + 1
+
+    def get_line(self, row_id: int) -> bytes:
+        start = self.offsets[row_id]
+        end = self.data.find(b'\n', start)
+        return self.data[start:end if end != -1 else len(self.data)]
+
+    def get_channel(self, row_id: int) -> str:
+        return self.channel_names[self.channel_ids[row_id]]
+
+    def get_series(self, row_id: int) -> str:
+        return self.series_names[self.series_ids[row_id]]
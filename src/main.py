@@ -4,7 +4,9 @@ from typing import List
 from business_objects.video import Video
 from constants import PERMANENTDIR, TEMPDIR, THUMBDIR
 from sources import SOURCES
+from tools.cached_downloader import remove_legacy_pages
 from tools.misc import save_to_json
+from tools.thumbnails import thumbnail_pipeline
 
 
 def scrape_everything() -> List[Video]:
@@ -32,9 +34,13 @@ if __name__ == '__main__':
     os.makedirs(TEMPDIR, exist_ok=True)
     os.makedirs(PERMANENTDIR, exist_ok=True)
     os.makedirs(THUMBDIR, exist_ok=True)
+    remove_legacy_pages()
 
     videos, page_links = scrape_everything()
 
+    # The scrapers only queue the thumbnails. We have to wait for them before the videos are published.
+    thumbnail_pipeline.close()
+
     save_to_json(videos=videos, page_links=page_links)
 
     print('Done.')
@@ -1,17 +1,15 @@
 import os
 import re
-import shutil
 from typing import List
 
 from bs4 import BeautifulSoup
 from business_objects.video import RegularVideo, UnavailableVideo, Video
 from constants import TEMPDIR, THUMBDIR
 from filmliste.filmliste import Filmliste
-from tools.cached_downloader import download_cached
-from tools.misc import (download_image, get_cache_name_for_paginated_page,
-                        get_cache_name_for_start_page,
-                        get_cache_name_for_summary_file,
+from tools.cached_downloader import download_cached, download_many_cached
+from tools.misc import (get_cache_name_for_summary_file,
                         get_category_shortname, read_file_to_string)
+from tools.thumbnails import download_image
 
 from scrapers.scraper import Scraper
 
@@ -30,6 +28,7 @@ def get_page_links(page: str) -> List[str]:
 
 
 class BrScraper(Scraper):
+    filmliste_channels = ['BR']
 
     def __init__(self, name: str, link: str):
         self.name = name
@@ -37,36 +36,14 @@ class BrScraper(Scraper):
 
     def _prepare_corpus(self):
         link_shortname = get_category_shortname(self.name)
-        start_page_filename = os.path.join(
-            TEMPDIR,
-            get_cache_name_for_start_page(
-                scraper_name=self.scraper_name,
-                category_shortname=link_shortname,
-            ),
-        )
-        start_page = download_cached(
-            uri=self.link,
-            cache_filename=start_page_filename,
-        )
+        start_page = download_cached(uri=self.link)
 
         page_links = get_page_links(start_page)
-        if not page_links:
-            # There is no pagination.
-            # Copy the start page to page 1 and add this as a pseudo page link.
-            filename_for_page_1 = os.path.join(
-                TEMPDIR,
-                get_cache_name_for_paginated_page(
-                    scraper_name=self.scraper_name,
-                    category_shortname=link_shortname,
-                    page_number=1,
-                ),
-            )
-            # Don't copy it if we have done this already.
-            if not os.path.exists(filename_for_page_1):
-                shutil.copyfile(start_page_filename, filename_for_page_1)
-            # Just append something so that we have something to iterate over in the next loop.
-            # Because we just copied the file, we have a cache hit anyways and will never read this fake URI.
-            page_links.append('')
+        if page_links:
+            paginated_pages = download_many_cached(page_links)
+        else:
+            # There is no pagination. So, the start page is the only page.
+            paginated_pages = [start_page]
 
         summary_file_name = os.path.join(
             TEMPDIR,
@@ -76,22 +53,10 @@ class BrScraper(Scraper):
             ),
         )
 
-        if not os.path.exists(summary_file_name):
-            # download each page and put the relevant part into the summary file
-            for page_number, page_link in enumerate(page_links, start=1):
-                paginated_page_filename = os.path.join(
-                    TEMPDIR,
-                    get_cache_name_for_paginated_page(
-                        scraper_name=self.scraper_name,
-                        category_shortname=link_shortname,
-                        page_number=page_number,
-                    ),
-                )
-                paginated_page = download_cached(
-                    uri=page_link,
-                    cache_filename=paginated_page_filename,
-                )
-
+        # Put the relevant part of each page into the summary file.
+        # We write it anew each time because the cached pages might have changed since the last time.
+        with open(summary_file_name, 'w') as file:
+            for paginated_page in paginated_pages:
                 # Here, we don't use BeautifulSoup to write the relevant part to the file because that would change the HTML code (due to pretty printing).
                 matches = re \
                     .compile(r'.*<div class="section_inner clearFix">(?P<content>.*)<div class="detail">.*', re.DOTALL) \
@@ -99,8 +64,7 @@ class BrScraper(Scraper):
                 if not matches:
                     raise Exception
                 main_part = matches.group('content')
-                with open(summary_file_name, 'a') as file:
-                    file.write(main_part)
+                file.write(main_part)
 
         # parse each entry of that file
         items = re.split(
@@ -120,6 +84,7 @@ class BrScraper(Scraper):
 
         print(f'Found {len(items)} video(s) for “{self.get_name()}”.')
 
+        episodes = []
         for item in items:
             soup = BeautifulSoup(item, 'html.parser')
 
@@ -158,15 +123,23 @@ class BrScraper(Scraper):
                 target_filename=local_image_filename,
             )
 
-            # Now, fetch the video link.
-            candidates = filmliste.search(
-                original_title=original_title,
-                clean_title=clean_title,
-                series=series,
-            )
+            episodes.append(
+                (original_title, clean_title, series, short_name, local_image_filename))
+
+        # Now, fetch the video links. We search for all episodes at once because that is much faster than one by one.
+        # We only need the best working candidate, so the others are not checked.
+        candidate_iterators = filmliste.search_many_ranked([
+            (clean_title, original_title, series)
+            for original_title, clean_title, series, _, _
+            in episodes
+        ])
+
+        for episode, candidates in zip(episodes, candidate_iterators):
+            _, clean_title, series, short_name, local_image_filename = episode
 
             # Maybe the video was not found.
-            video_link = candidates[0]['link'] if candidates else None
+            best_candidate = next(candidates, None)
+            video_link = best_candidate['link'] if best_candidate else None
 
             if video_link:
                 video = RegularVideo(
@@ -4,12 +4,15 @@ from datetime import datetime
 from typing import List
 
 from business_objects.video import RegularVideo, Video
-from constants import TEMPDIR, THUMBDIR
+from constants import THUMBDIR
 from filmliste.filmliste import Filmliste
 from scrapers.kikascraper import KikaScraper
 from tools.cached_downloader import download_cached
-from tools.misc import (download_image, get_cache_name_for_start_page,
-                        get_category_shortname)
+from tools.thumbnails import download_image
+
+
+# This is the series of the episodes in the Filmliste.
+LOGO_SERIES = 'logo!'
 
 
 class LogoScraper(KikaScraper):
@@ -25,30 +28,36 @@ class LogoScraper(KikaScraper):
         download_image(uri=thumbnail_uri, target_filename=local_filename)
 
         # Fetch the logo.
-        link_shortname = get_category_shortname(self.name)
-        start_page_filename = os.path.join(
-            TEMPDIR,
-            get_cache_name_for_start_page(
-                scraper_name=self.scraper_name,
-                category_shortname=link_shortname,
-            ),
-        )
-        start_page = download_cached(
-            uri=self.link, cache_filename=start_page_filename)
+        start_page = download_cached(uri=self.link)
 
         self._download_logo(html=start_page)
 
         videos = []
-        episodes = Filmliste().search(clean_title='logo! vom')
+        # The episodes only differ by their date, so we fetch all of them by date instead of searching their titles.
+        filmliste = Filmliste()
+        episodes = [
+            episode
+            for episode
+            in filmliste.search_series_by_date(series=LOGO_SERIES)
+            if episode['title'] and 'logo! vom' in episode['title']
+        ]
+        if not episodes:
+            # The series might be named differently in the Filmliste (or might not be loaded). Then, we search the titles in all
+            # series as we used to.
+            print(f'There are no episodes in the series “{LOGO_SERIES}”. Searching their titles instead…')
+            episodes = [
+                {**dict(episode), 'sortable_date': datetime.strptime(episode['date'], '%d.%m.%Y').date().isoformat()}
+                for episode
+                in filmliste.search(clean_title='logo! vom')
+            ]
         print(f'Found {len(episodes)} video(s) for “{self.name}”.')
         for episode in episodes:
             title = episode['title']
             if 'Gebärdensprache' in title:
                 continue
 
-            sortable_date = datetime.strptime(episode['date'], '%d.%m.%Y')
-
-            shortname = f'Logo {sortable_date}'
+            # The shortnames used to contain a whole datetime. We keep them as they were.
+            shortname = f'Logo {episode["sortable_date"]} 00:00:00'
 
             video_uri = episode['link']
 
@@ -6,11 +6,11 @@ from urllib.parse import urlparse
 from bs4 import BeautifulSoup
 from business_objects.video import (NotHotlinkableVideo, RegularVideo,
                                     UnavailableVideo, Video)
-from constants import PERMANENTDIR, TEMPDIR, THUMBDIR
+from constants import THUMBDIR
 from scrapers.scraper import Scraper
 from tools.cached_downloader import download_cached
-from tools.misc import (download_image, get_cache_name_for_start_page,
-                        get_category_shortname, group_by)
+from tools.misc import get_category_shortname, group_by
+from tools.thumbnails import download_image
 
 
 class SachgeschichtenMetaScraper(Scraper):
@@ -35,18 +35,7 @@ class SachgeschichtenMetaScraper(Scraper):
 
     def _parse_wdrmaus(self) -> List[Video]:
         category_name = 'WDRMaus'
-        link_shortname = get_category_shortname(category_name)
-        start_page_filename = os.path.join(
-            TEMPDIR,
-            get_cache_name_for_start_page(
-                scraper_name=self.scraper_name,
-                category_shortname=link_shortname,
-            ),
-        )
-        html = download_cached(
-            uri=self.link_wdrmaus,
-            cache_filename=start_page_filename,
-        )
+        html = download_cached(uri=self.link_wdrmaus)
 
         soup = BeautifulSoup(html, 'html.parser')
         result = []
@@ -62,11 +51,10 @@ class SachgeschichtenMetaScraper(Scraper):
                 subpage_uri).group('shortname')
 
             # fetch the page for the thumbnail
-            sub_page_filename = os.path.join(
-                PERMANENTDIR, f'wdrmaus-{short_title}.html')
+            # The thumbnail of a video does not change, so we keep the page as long as it is cached.
             subpage_html = download_cached(
                 uri=absolute_subpage_uri,
-                cache_filename=sub_page_filename,
+                max_age=None,
             )
             subpage_soup = BeautifulSoup(subpage_html, 'html.parser')
             relative_image_path = subpage_soup.select_one(
@@ -95,18 +83,7 @@ class SachgeschichtenMetaScraper(Scraper):
         result = []
 
         category_name = 'WDRKinder'
-        link_shortname = get_category_shortname(category_name)
-        start_page_filename = os.path.join(
-            TEMPDIR,
-            get_cache_name_for_start_page(
-                scraper_name=self.scraper_name,
-                category_shortname=link_shortname,
-            ),
-        )
-        html = download_cached(
-            uri=self.link_kinder_wdr,
-            cache_filename=start_page_filename,
-        )
+        html = download_cached(uri=self.link_kinder_wdr)
 
         soup = BeautifulSoup(html, 'html.parser')
 
@@ -177,18 +154,7 @@ class SachgeschichtenMetaScraper(Scraper):
         result = []
 
         category_name = 'WDRKinderPodcast'
-        link_shortname = get_category_shortname(category_name)
-        start_page_filename = os.path.join(
-            TEMPDIR,
-            get_cache_name_for_start_page(
-                scraper_name=self.scraper_name,
-                category_shortname=link_shortname,
-            ),
-        )
-        xml = download_cached(
-            uri=self.link_kinder_wdr_podcast,
-            cache_filename=start_page_filename,
-        )
+        xml = download_cached(uri=self.link_kinder_wdr_podcast)
 
         soup = BeautifulSoup(xml, 'xml')
 
@@ -8,6 +8,9 @@ from tools.deduplication import cluster_by_duplicity, fuse_videos
 
 
 class WildeWeltMetaScraper(Scraper):
+    # It consists of KikaScrapers and BrScrapers.
+    filmliste_channels = KikaScraper.filmliste_channels + BrScraper.filmliste_channels
+
     def __init__(self):
         self.name = 'Wilde Welt'
         self.links = {}
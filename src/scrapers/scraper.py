@@ -4,6 +4,9 @@ from business_objects.video import Video
 
 
 class Scraper:
+    # These are the channels of the Filmliste that the scraper searches in (see FILMLISTE_LOAD_PROFILE).
+    filmliste_channels = []
+
     def get_name(self) -> str:
         return self.name
 
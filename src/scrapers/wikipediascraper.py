@@ -1,13 +1,10 @@
 import json
-import os
 import re
 from typing import List
 
 from bs4 import BeautifulSoup
 from business_objects.video import Video
-from constants import TEMPDIR
 from tools.cached_downloader import download_cached
-from tools.misc import get_cache_name_for_start_page
 
 
 class WikipediaScraper:
@@ -22,8 +19,7 @@ class WikipediaScraper:
 
         # Read the content of that Wikipedia page.
         uri = f'https://{wikipedia_language}.wikipedia.org/w/api.php?action=parse&format=json&origin=*&page={page_name}&prop=text'
-        cache_filename = os.path.join(TEMPDIR, get_cache_name_for_start_page(page_name + '-wikipedia'))
-        content = download_cached(uri=uri, cache_filename=cache_filename)
+        content = download_cached(uri=uri)
         html_text = json.loads(content)['parse']['text']['*']
         soup = BeautifulSoup(html_text, 'html.parser')
 
@@ -1,3 +1,6 @@
+from typing import Optional, Set
+
+from constants import FILMLISTE_LOAD_PROFILE
 from scrapers.kikascraper import KikaScraper
 from scrapers.metascrapers.logoscraper import LogoScraper
 from scrapers.metascrapers.sachgeschichtenmetascraper import \
@@ -13,3 +16,17 @@ SOURCES = {
     SachgeschichtenMetaScraper(),
     WildeWeltMetaScraper(),
 }
+
+
+def get_filmliste_channels() -> Optional[Set[str]]:
+    # This returns None if all channels are to be loaded (see FILMLISTE_LOAD_PROFILE).
+    if FILMLISTE_LOAD_PROFILE == 'full':
+        return None
+
+    return {
+        channel
+        for scraper
+        in SOURCES
+        for channel
+        in scraper.filmliste_channels
+    }
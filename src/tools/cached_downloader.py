@@ -1,29 +1,71 @@
+import glob
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Optional
 
-import requests
+from constants import (PAGE_CACHE_MAX_AGE, PAGE_DOWNLOAD_THREADS,
+                       PERMANENTDIR, TEMPDIR)
+from dateutil.relativedelta import relativedelta
 
+from tools.http_client import http_client
+from tools.page_cache import page_cache
 
-def download_cached(uri: str, cache_filename: str) -> str:
-    if not os.path.exists(cache_filename):
-        # Put some sleep here when an actual HTTP request is done.
-        time.sleep(1)
 
-        response = requests.get(uri)
+def download_cached(uri: str, max_age: Optional[relativedelta] = PAGE_CACHE_MAX_AGE) -> str:
+    # A cached page is used as it is for max_age (or as long as it is cached if that is None). After that, we ask the server
+    # whether the page has changed since. If it has not, the server only answers with 304 Not Modified, and we keep using the
+    # cached page.
+    now = datetime.now(tz=timezone.utc)
+    cached_page = page_cache.get(uri)
+    if cached_page and (max_age is None or cached_page['fetched'] >= (now - max_age).timestamp()):
+        return cached_page['content']
 
-        if response.status_code != 200:
-            raise Exception
+    headers = {}
+    if cached_page:
+        if cached_page['etag']:
+            headers['If-None-Match'] = cached_page['etag']
+        if cached_page['last_modified']:
+            headers['If-Modified-Since'] = cached_page['last_modified']
 
-        # Some pages return UTF-8, but don't declare it as such.
-        response.encoding = response.apparent_encoding
+    # The client takes care not to send too many requests to the same host.
+    response = http_client.get(uri, headers=headers)
 
-        with open(cache_filename, 'w') as file:
-            file.write(response.text)
+    if cached_page and response.status_code == 304:
+        page_cache.refresh(uri, fetched=now.timestamp())
+        return cached_page['content']
 
-    lines = []
-    with open(cache_filename, 'r') as file:
-        for line in file:
-            lines.append(line)
+    if response.status_code != 200:
+        raise Exception
 
-    result = ''.join(lines)
-    return result
+    # Some pages return UTF-8, but don't declare it as such.
+    response.encoding = response.apparent_encoding
+
+    page_cache.put(
+        uri,
+        content=response.text,
+        etag=response.headers.get('ETag'),
+        last_modified=response.headers.get('Last-Modified'),
+        fetched=now.timestamp(),
+    )
+
+    return response.text
+
+
+def download_many_cached(uris: List[str], max_age: Optional[relativedelta] = PAGE_CACHE_MAX_AGE) -> List[str]:
+    # The pages are downloaded in several threads, but the client still keeps to the rate limit of each host. So, this mostly
+    # saves the time that we would otherwise spend waiting for the answers. The pages are returned in the order of the URIs.
+    with ThreadPoolExecutor(max_workers=PAGE_DOWNLOAD_THREADS) as executor:
+        return list(executor.map(lambda uri: download_cached(uri=uri, max_age=max_age), uris))
+
+
+def remove_legacy_pages() -> None:
+    # The pages used to be cached uncompressed, one file per page. They are in the page cache now (see PageCache), so the old
+    # files are not read anymore.
+    patterns = [
+        os.path.join(TEMPDIR, '*.html'),
+        os.path.join(PERMANENTDIR, 'wdrmaus-*.html'),
+    ]
+    for pattern in patterns:
+        for filename in glob.glob(pattern):
+            os.remove(filename)
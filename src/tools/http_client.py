@@ -0,0 +1,78 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from constants import (HTTP_BURST_PER_HOST, HTTP_POOL_SIZE,
+                       HTTP_REQUESTS_PER_SECOND_PER_HOST)
+from requests.adapters import HTTPAdapter
+
+
+class TokenBucket:
+
+    # Each request takes a token. The tokens are refilled at a fixed rate up to the capacity. So, a few requests may go out at
+    # once, but in the long run, there are no more than rate requests per second.
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+
+            # If there is no token left, we take it in advance and wait until it would have been refilled.
+            self.tokens -= 1
+            waiting_time = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        time.sleep(waiting_time)
+
+
+class HttpClient:
+
+    # All HTTP requests should go through this. It keeps the connections alive between requests and limits the rate per host.
+    # Requests to different hosts don't slow each other down.
+
+    def __init__(
+        self,
+        requests_per_second: float = HTTP_REQUESTS_PER_SECOND_PER_HOST,
+        burst: int = HTTP_BURST_PER_HOST,
+        pool_size: int = HTTP_POOL_SIZE,
+    ) -> None:
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.host_2_bucket = {}
+        self.host_2_bucket_lock = threading.Lock()
+
+    def request(self, method: str, uri: str, **kwargs) -> requests.Response:
+        host = urlsplit(uri).netloc
+        with self.host_2_bucket_lock:
+            if host not in self.host_2_bucket:
+                self.host_2_bucket[host] = TokenBucket(self.requests_per_second, self.burst)
+            bucket = self.host_2_bucket[host]
+
+        bucket.take()
+
+        return self.session.request(method, uri, **kwargs)
+
+    def get(self, uri: str, **kwargs) -> requests.Response:
+        return self.request('GET', uri, **kwargs)
+
+    def head(self, uri: str, **kwargs) -> requests.Response:
+        # Like requests.head, we don't follow redirects by default.
+        kwargs.setdefault('allow_redirects', False)
+        return self.request('HEAD', uri, **kwargs)
+
+
+# This is the client for the pages and images of the broadcasters.
+http_client = HttpClient()
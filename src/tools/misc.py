@@ -1,9 +1,7 @@
 import os
 import re
-import time
 from typing import Any, Dict, List
 
-import requests
 from business_objects.video import Video
 
 
@@ -19,21 +17,6 @@ def get_category_shortname(category: str) -> str:
     return result
 
 
-def get_cache_name_for_start_page(
-    scraper_name: str,
-    category_shortname: str,
-) -> str:
-    return f'{scraper_name}-{category_shortname}-start.html'
-
-
-def get_cache_name_for_paginated_page(
-    scraper_name: str,
-    category_shortname: str,
-    page_number: int,
-) -> str:
-    return f'{scraper_name}-{category_shortname}-page-{page_number}.html'
-
-
 def get_cache_name_for_summary_file(
     scraper_name: str,
     category_shortname: str,
@@ -79,19 +62,6 @@ def save_to_json(videos: List[Video], page_links: Dict[str, List[str]]) -> None:
         file.write(']\n\n')
 
 
-def download_image(uri: str, target_filename: str) -> None:
-    if not os.path.exists(target_filename):
-        # Put some sleep here when an actual HTTP request is done.
-        time.sleep(1)
-        response = requests.get(uri)
-        if response.status_code != 200:
-            # Then we go without the image.
-            return
-
-        with open(target_filename, 'wb') as file:
-            file.write(response.content)
-
-
 def group_by(items: List[Any], criterion) -> Dict[str, Any]:
     result = {}
     for item in items:
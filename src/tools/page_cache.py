@@ -0,0 +1,128 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+
+from constants import PAGE_CACHE_DIR, PAGE_CACHE_MAX_SIZE
+
+
+class PageCache:
+
+    # This holds the downloaded pages compressed in files that are named by the hash of their URI. An index database keeps
+    # their metadata (for the conditional requests, see download_cached), their size, and when they were used the last time.
+    # Lookups only go to the index. If the pages take more than max_size bytes, the least recently used ones are removed.
+
+    INDEX_FILENAME = 'index.sqlite'
+
+    def __init__(self, directory: str = PAGE_CACHE_DIR, max_size: int = PAGE_CACHE_MAX_SIZE) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.connection = None
+        # The pages might be downloaded in several threads.
+        self.lock = threading.Lock()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        # We only open the index when it is needed so that importing this does not create any files.
+        if not self.connection:
+            os.makedirs(self.directory, exist_ok=True)
+            self.connection = sqlite3.connect(
+                os.path.join(self.directory, PageCache.INDEX_FILENAME),
+                check_same_thread=False,
+                isolation_level=None,
+            )
+            self.connection.row_factory = sqlite3.Row
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS pages ('
+                'uri_hash TEXT PRIMARY KEY, '
+                'uri TEXT, '
+                'size INTEGER, '
+                'etag TEXT, '
+                'last_modified TEXT, '
+                'fetched REAL, '
+                'last_used REAL'
+                ')')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS pages_last_used_index ON pages(last_used)')
+        return self.connection
+
+    def _hash(uri: str) -> str:
+        return hashlib.sha1(uri.encode('utf-8')).hexdigest()
+
+    def _get_filename(self, uri_hash: str) -> str:
+        return os.path.join(self.directory, f'{uri_hash}.zlib')
+
+    def get(self, uri: str) -> Optional[dict]:
+        # This returns the metadata and the content of the page, or None if it is not cached.
+        uri_hash = PageCache._hash(uri)
+        with self.lock:
+            connection = self._get_connection()
+            row = connection.execute('SELECT * FROM pages WHERE uri_hash = ?', (uri_hash,)).fetchone()
+            if not row:
+                return None
+
+            try:
+                with open(self._get_filename(uri_hash), 'rb') as file:
+                    content = zlib.decompress(file.read()).decode('utf-8')
+            except (OSError, zlib.error):
+                # The file is gone or broken. So, the page is not cached anymore.
+                connection.execute('DELETE FROM pages WHERE uri_hash = ?', (uri_hash,))
+                return None
+
+            connection.execute('UPDATE pages SET last_used = ? WHERE uri_hash = ?', (time.time(), uri_hash))
+
+        result = dict(row)
+        result['content'] = content
+        return result
+
+    def put(self, uri: str, content: str, etag: Optional[str], last_modified: Optional[str], fetched: float) -> None:
+        uri_hash = PageCache._hash(uri)
+        compressed_content = zlib.compress(content.encode('utf-8'), 9)
+        filename = self._get_filename(uri_hash)
+        with self.lock:
+            connection = self._get_connection()
+            # We write to another file first so that there is never a half-written page.
+            with open(filename + '.tmp', 'wb') as file:
+                file.write(compressed_content)
+            os.replace(filename + '.tmp', filename)
+
+            connection.execute(
+                'INSERT OR REPLACE INTO pages (uri_hash, uri, size, etag, last_modified, fetched, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (uri_hash, uri, len(compressed_content), etag, last_modified, fetched, time.time()),
+            )
+            self._evict(keep_uri_hash=uri_hash)
+
+    def refresh(self, uri: str, fetched: float) -> None:
+        # The server has told us that the page has not changed.
+        with self.lock:
+            self._get_connection().execute(
+                'UPDATE pages SET fetched = ? WHERE uri_hash = ?', (fetched, PageCache._hash(uri)))
+
+    def _evict(self, keep_uri_hash: str) -> None:
+        # We remove the least recently used pages until the rest fits, but never the page that has just been added.
+        connection = self._get_connection()
+        total_size = connection.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+        if total_size <= self.max_size:
+            return
+
+        rows = connection.execute(
+            'SELECT uri_hash, size FROM pages WHERE uri_hash != ? ORDER BY last_used', (keep_uri_hash,))
+        evicted_uri_hashes = []
+        for row in rows:
+            if total_size <= self.max_size:
+                break
+            evicted_uri_hashes.append(row['uri_hash'])
+            total_size -= row['size']
+
+        for uri_hash in evicted_uri_hashes:
+            connection.execute('DELETE FROM pages WHERE uri_hash = ?', (uri_hash,))
+            try:
+                os.remove(self._get_filename(uri_hash))
+            except FileNotFoundError:
+                pass
+
+
+# This is the cache for the pages of the broadcasters.
+page_cache = PageCache()
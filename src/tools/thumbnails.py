@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from constants import (THUMBNAIL_DOWNLOAD_THREADS, THUMBNAIL_JPEG_QUALITY,
+                       THUMBNAIL_ORIGINALS_DIR, THUMBNAIL_PROCESSES,
+                       THUMBNAIL_WIDTH)
+
+from tools.http_client import http_client
+
+
+def resize_image(original_filename: str, target_filename: str, width: int, jpeg_quality: int) -> None:
+    # This runs in another process because decoding and encoding the images is CPU-bound.
+    # Pillow is only imported here, so that the Filmliste can be updated without it (see update_filmliste.py).
+    from PIL import Image
+
+    with Image.open(original_filename) as image:
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+
+        temporary_filename = target_filename + '.tmp'
+        if target_filename.lower().endswith(('.jpg', '.jpeg')):
+            # JPEG cannot store transparency.
+            image.convert('RGB').save(temporary_filename, 'JPEG', quality=jpeg_quality, optimize=True, progressive=True)
+        else:
+            image.save(temporary_filename, image.format or 'PNG', optimize=True)
+    os.replace(temporary_filename, target_filename)
+
+
+class ThumbnailPipeline:
+
+    # The thumbnails are downloaded in several threads and then downscaled to the width in which the player shows them (and
+    # recompressed) in several processes. The original images are kept in their own directory, so that nothing has to be done
+    # if neither they nor the thumbnails have changed.
+
+    def __init__(
+        self,
+        download_threads: int = THUMBNAIL_DOWNLOAD_THREADS,
+        processes: int = THUMBNAIL_PROCESSES,
+        width: int = THUMBNAIL_WIDTH,
+        jpeg_quality: int = THUMBNAIL_JPEG_QUALITY,
+    ) -> None:
+        self.download_threads = download_threads
+        self.processes = processes
+        self.width = width
+        self.jpeg_quality = jpeg_quality
+
+        self.download_executor = None
+        self.resize_executor = None
+        self.futures = []
+        self.target_filenames = set()
+        self.lock = threading.Lock()
+
+    def add(self, uri: str, target_filename: str) -> None:
+        with self.lock:
+            # Some images (e.g., the logos) are requested by several scrapers.
+            if target_filename in self.target_filenames:
+                return
+            self.target_filenames.add(target_filename)
+
+            # We only start the threads and processes when they are needed. The processes are started from the download threads,
+            # so they are spawned instead of forked (which would copy the locks of the other threads in whatever state they are).
+            if not self.download_executor:
+                self.download_executor = ThreadPoolExecutor(max_workers=self.download_threads)
+                self.resize_executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+
+            self.futures.append(self.download_executor.submit(self._process, uri, target_filename))
+
+    def wait(self) -> None:
+        # This returns when all thumbnails that have been added so far are done.
+        with self.lock:
+            futures = self.futures
+            self.futures = []
+        for future in futures:
+            try:
+                future.result()
+            except Exception as exception:
+                # Then we go without the image.
+                print(f'There was an error while processing a thumbnail: {exception}')
+
+    def close(self) -> None:
+        self.wait()
+        with self.lock:
+            if self.download_executor:
+                self.download_executor.shutdown()
+                self.resize_executor.shutdown()
+                self.download_executor = None
+                self.resize_executor = None
+
+    def _process(self, uri: str, target_filename: str) -> None:
+        os.makedirs(THUMBNAIL_ORIGINALS_DIR, exist_ok=True)
+        original_filename = os.path.join(THUMBNAIL_ORIGINALS_DIR, os.path.basename(target_filename))
+
+        if not os.path.exists(original_filename):
+            if not ThumbnailPipeline._download(uri, original_filename):
+                return
+
+        if os.path.exists(target_filename) and os.path.getmtime(target_filename) >= os.path.getmtime(original_filename):
+            # The thumbnail has been made from this original already.
+            return
+
+        try:
+            self.resize_executor.submit(
+                resize_image, original_filename, target_filename, self.width, self.jpeg_quality).result()
+        except Exception as exception:
+            # The original might be in a format that we cannot read. It is better to use it as it is than to have no image.
+            print(f'Could not downscale “{uri}”, using it as it is: {exception}')
+            shutil.copyfile(original_filename, target_filename)
+
+    def _download(uri: str, target_filename: str) -> bool:
+        # The client takes care not to send too many requests to the same host.
+        with http_client.get(uri, stream=True) as response:
+            if response.status_code != 200:
+                return False
+
+            # We write the image in chunks instead of holding all of it in memory, and to another file first so that there is
+            # never a half-written image.
+            temporary_filename = target_filename + '.tmp'
+            with open(temporary_filename, 'wb') as file:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    file.write(chunk)
+            os.replace(temporary_filename, target_filename)
+        return True
+
+
+# This is the pipeline for the images of all scrapers.
+thumbnail_pipeline = ThumbnailPipeline()
+
+
+def download_image(uri: str, target_filename: str) -> None:
+    # The image is downloaded and downscaled in the background. It is there when thumbnail_pipeline.wait() returns.
+    thumbnail_pipeline.add(uri=uri, target_filename=target_filename)
@@ -0,0 +1,17 @@
+import os
+
+from constants import PERMANENTDIR
+from filmliste.archivereader import get_archive_uri
+from filmliste.filmliste import Filmliste
+
+if __name__ == '__main__':
+    os.makedirs(PERMANENTDIR, exist_ok=True)
+
+    uri = get_archive_uri()
+    print(f'Loading the Filmliste from {uri}…')
+    filmliste = Filmliste()
+    # If the database was outdated, the Filmliste has just been loaded from the archive already (see Filmliste.__init__).
+    if Filmliste.loaded_archive_uri != uri:
+        filmliste.update_from_archive(uri=uri)
+
+    print('Done.')
@@ -5,7 +5,6 @@ script_path=$(dirname $(realpath -s $0))
 (
   cd ${script_path}
   assets/updatefilmliste.sh
-  rm -rf cache/temp
   python src/main.py
 )
 